@@ -8,25 +8,228 @@ Description: Handles audio recording, playback, compression, and WAV file
 import pyaudio      # For audio I/O
 import wave         # For reading/writing WAV files
 import os           # For path manipulation, directory creation
-import time         # For sleep
 import threading   # For timers used to auto-stop recordings
 import zlib         # For data compression/decompression
 import audioop      # For audio operations like rate conversion, bit depth change
 import struct       # For packing/unpacking header data
+import mmap         # For mapping WAV sample data during playback
+import math         # For reducing resampling ratios
 import numpy as np  # For numerical operations (dynamic range compression)
 import logging      # For logging messages
+import traceback    # For callbacks that cannot take exc_info
+import inspect      # For checking what the log callback accepts
 from datetime import datetime # For timestamps in filenames
 import uuid        # For unique filename suffixes
 
+try:
+    import zstandard as zstd  # Optional: faster, tighter compression of voice payloads
+except ImportError:
+    zstd = None
+
+try:
+    from scipy.signal import resample_poly  # Optional: anti-aliased polyphase resampling
+except ImportError:
+    resample_poly = None
+
 # Default audio config used if `utils.load_config()` is unavailable or incomplete
 DEFAULT_AUDIO_CONFIG = {
     "default_quality": "Low",
     "default_length_sec": 3,
-    "quality_rates_hz": {"Ultra Low": 4000, "Very Low": 8000, "Low": 11025}
+    "quality_rates_hz": {"Ultra Low": 4000, "Very Low": 8000, "Low": 11025},
+    "codecs": {"Ultra Low": "ulaw", "Very Low": "ulaw", "Low": "pcm"},
+    "normalize": False
 }
 
+NORMALIZE_PEAK = 32000 # Target peak for `audio.normalize` (a little headroom below full scale)
+
+# --- Sample codecs (selected per quality via `audio.codecs`) ---
+CODEC_PCM = "pcm"    # Samples at the recorded bit depth
+CODEC_PCM8 = "pcm8"  # Linear 8-bit unsigned PCM
+CODEC_ULAW = "ulaw"  # 8-bit G.711 µ-law, decoded back to 16-bit on receipt
+CODEC_ADPCM = "adpcm" # 4-bit IMA ADPCM (mono 16-bit input), half the size of µ-law; decoded to 16-bit
+SUPPORTED_CODECS = (CODEC_PCM, CODEC_PCM8, CODEC_ULAW, CODEC_ADPCM)
+_CODEC_IDS = {CODEC_PCM: 0, CODEC_PCM8: 1, CODEC_ULAW: 2, CODEC_ADPCM: 3}
+_CODEC_NAMES = {codec_id: name for name, codec_id in _CODEC_IDS.items()}
+
+# Fixed audio header inside the compressed payload: rate, channels, sample width, codec id
+AUDIO_HEADER = struct.Struct('!IBBB')
+
+# Adaptive stream buffer sizing: after XRUN_THRESHOLD over/underruns in one stream,
+# the next stream opens with twice the frames_per_buffer (up to MAX_CHUNK).
+MAX_CHUNK = 8192
+XRUN_THRESHOLD = 3
+_INPUT_XRUN_FLAGS = pyaudio.paInputOverflow | pyaudio.paInputUnderflow
+
+# Canonical 44-byte RIFF/WAVE header for linear PCM (little-endian)
+WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
 # AudioHandler now expects an injected `config` dict; do not load config at import time.
 
+# --- Compressed payload framing ---
+# Compressed payloads start with a one-byte codec tag so the receiver can pick
+# the matching decompressor. Payloads from older versions are bare zlib streams
+# (first byte 0x78) and are still accepted.
+COMPRESSION_ZLIB = 0x01       # zlib stream (decode only; senders now emit raw deflate)
+COMPRESSION_ZSTD = 0x02
+COMPRESSION_ZSTD_DICT = 0x03  # zstd with the trained dictionary from `audio.zstd_dict_path`
+COMPRESSION_DEFLATE = 0x04    # Raw deflate, no zlib header/trailer
+ZLIB_LEVEL = 9
+ZSTD_LEVEL = 10
+
+# Pristine raw-deflate state (largest hash table); each message compresses with a copy of it.
+_DEFLATE_TEMPLATE = zlib.compressobj(level=ZLIB_LEVEL, method=zlib.DEFLATED, wbits=-15, memLevel=9)
+
+# zstd contexts are reused across messages to avoid per-call setup cost.
+# A ZstdCompressor is not thread-safe and sends compress on worker threads, so
+# use of any compressor (this one or a handler's dictionary one) holds _ZSTD_CCTX_LOCK.
+_ZSTD_CCTX = zstd.ZstdCompressor(level=ZSTD_LEVEL, write_checksum=False) if zstd else None
+_ZSTD_CCTX_LOCK = threading.Lock()
+_ZSTD_DCTX = zstd.ZstdDecompressor() if zstd else None
+_DECOMPRESS_ERRORS = (zlib.error, zstd.ZstdError) if zstd else (zlib.error,)
+
+
+def _resample_pcm16(frames: bytes, channels: int, from_rate: int, to_rate: int) -> bytes:
+    """Resample interleaved 16-bit PCM with a polyphase FIR (requires scipy)."""
+    g = math.gcd(from_rate, to_rate)
+    samples = np.frombuffer(frames, dtype='<i2').reshape(-1, channels)
+    resampled = resample_poly(samples, to_rate // g, from_rate // g, axis=0)
+    np.rint(resampled, out=resampled)
+    np.clip(resampled, -32768, 32767, out=resampled)
+    return resampled.astype('<i2').tobytes()
+
+
+def _pcm16_to_u8(frames: bytes) -> bytes:
+    """Convert 16-bit signed PCM to 8-bit unsigned PCM (the WAV 8-bit format)."""
+    samples = np.frombuffer(frames, dtype='<i2')
+    return ((samples >> 8).astype(np.int8).view(np.uint8) ^ 0x80).tobytes()
+
+
+def _normalize_pcm16(frames: bytes) -> bytes:
+    """Scale 16-bit PCM up so its peak reaches NORMALIZE_PEAK, using integer math only."""
+    samples = np.frombuffer(frames, dtype='<i2')
+    if not len(samples):
+        return frames
+    peak = max(int(samples.max()), -int(samples.min()))
+    if peak == 0 or peak >= NORMALIZE_PEAK:
+        return frames # Silence, or already loud enough: never attenuate
+    gain = NORMALIZE_PEAK * 256 // peak # Q8 fixed-point gain
+    scaled = samples.astype(np.int32)
+    scaled *= gain
+    scaled >>= 8
+    return scaled.astype('<i2').tobytes()
+
+
+def _build_ulaw_tables() -> tuple[np.ndarray, np.ndarray]:
+    """Build G.711 µ-law lookup tables: encode (indexed by uint16 sample bits) and decode (256 entries)."""
+    bias = 0x84
+    # Encoder: the standard 14-bit algorithm (as audioop.lin2ulaw): drop two bits,
+    # clip to 8159, add bias 33, find the segment, keep four mantissa bits, invert.
+    seg_end = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF], dtype=np.int32)
+    linear = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32) >> 2
+    mask = np.where(linear < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(linear), 8159) + (bias >> 2)
+    segment = np.searchsorted(seg_end, magnitude) # First segment whose end is >= magnitude
+    code = np.where(segment >= 8, 0x7F, (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F))
+    encode = (code ^ mask).astype(np.uint8)
+
+    ulaw = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (ulaw >> 4) & 0x07
+    magnitude = ((((ulaw & 0x0F) << 3) + bias) << exponent) - bias
+    decode = np.where(ulaw & 0x80, -magnitude, magnitude).astype('<i2')
+    return encode, decode
+
+_ULAW_ENCODE, _ULAW_DECODE = _build_ulaw_tables()
+
+
+def _pcm16_to_ulaw(frames: bytes) -> bytes:
+    """Encode 16-bit signed PCM as 8-bit µ-law."""
+    return _ULAW_ENCODE[np.frombuffer(frames, dtype='<i2').view(np.uint16)].tobytes()
+
+
+def _ulaw_to_pcm16(frames: bytes) -> bytearray:
+    """Decode 8-bit µ-law to 16-bit signed PCM, written straight into one preallocated buffer."""
+    codes = np.frombuffer(frames, dtype=np.uint8)
+    pcm = bytearray(len(codes) * 2)
+    np.take(_ULAW_DECODE, codes, out=np.frombuffer(pcm, dtype='<i2'))
+    return pcm
+
+
+def _pcm16_to_adpcm(frames: bytes) -> bytes:
+    """Encode mono 16-bit signed PCM as 4-bit IMA ADPCM (an odd trailing sample is dropped to fill whole bytes)."""
+    usable = len(frames) // 4 * 4
+    return audioop.lin2adpcm(memoryview(frames)[:usable], 2, None)[0]
+
+
+def _adpcm_to_pcm16(frames: bytes) -> bytes:
+    """Decode 4-bit IMA ADPCM to mono 16-bit signed PCM."""
+    return audioop.adpcm2lin(frames, 2, None)[0]
+
+
+def _parse_legacy_header(data_with_header: bytes) -> tuple[int, int, int, str, bytes]:
+    """Parse the length-prefixed ASCII 'rate,channels,width' header used by untagged payloads."""
+    header_size = data_with_header[0]
+    header_str = data_with_header[1 : 1 + header_size].decode('utf-8')
+    header_parts = header_str.split(',')
+    if len(header_parts) != 3:
+        raise ValueError(f"Invalid header format after decompression: '{header_str}'")
+    return (int(header_parts[0]), int(header_parts[1]), int(header_parts[2]),
+            CODEC_PCM, data_with_header[1 + header_size :])
+
+
+def _decompress_payload(compressed_data, dict_dctx=None) -> tuple[bytes, bool]:
+    """
+    Strip the codec tag from a compressed payload (any bytes-like object) and decompress it.
+    Returns (data_with_header, is_legacy); legacy payloads carry the ASCII header.
+    `dict_dctx` is the dictionary-aware zstd decompressor, if one is loaded.
+    The zstd frame carries the dictionary ID, so a sender using a different
+    dictionary is detected by zstd rather than producing garbage.
+    """
+    tag = compressed_data[0]
+    if tag == COMPRESSION_ZSTD_DICT:
+        if dict_dctx is None:
+            raise ValueError("Payload uses a zstd dictionary but none is loaded (set audio.zstd_dict_path)")
+        return dict_dctx.decompress(compressed_data[1:]), False
+    if tag == COMPRESSION_ZSTD:
+        if _ZSTD_DCTX is None:
+            raise ValueError("Payload is zstd-compressed but the 'zstandard' package is not installed")
+        return _ZSTD_DCTX.decompress(compressed_data[1:]), False
+    if tag == COMPRESSION_DEFLATE:
+        return zlib.decompress(compressed_data[1:], wbits=-15), False
+    if tag == COMPRESSION_ZLIB:
+        return zlib.decompress(compressed_data[1:]), False
+    return zlib.decompress(compressed_data), True # Legacy untagged zlib stream
+
+
+def _write_wav(filepath: str, channels: int, sample_width: int, rate: int, frames) -> None:
+    """
+    Write linear PCM `frames` (any contiguous buffer) as a WAV file.
+    Header and samples go out in one gathered write where os.writev exists,
+    so the sample buffer is never copied or split into small writes.
+    """
+    frames = memoryview(frames).cast('B')
+    data_len = len(frames)
+    block_align = channels * sample_width
+    header = WAV_HEADER.pack(b'RIFF', 36 + data_len, b'WAVE', b'fmt ', 16, 1,
+                             channels, rate, rate * block_align, block_align, sample_width * 8,
+                             b'data', data_len)
+    with open(filepath, 'wb') as f:
+        written = os.writev(f.fileno(), (header, frames)) if hasattr(os, 'writev') else 0
+        # Finish with ordinary writes on platforms without writev, or after a short write
+        if written < len(header):
+            f.write(header[written:])
+            written = len(header)
+        if written - len(header) < data_len:
+            f.write(frames[written - len(header):])
+
+
+def _accepts_keyword(func, name: str) -> bool:
+    """True if `func` can be called with keyword argument `name` (or **kwargs)."""
+    try:
+        params = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError): # No introspectable signature
+        return False
+    return any(p.kind == p.VAR_KEYWORD or (p.name == name and p.kind != p.POSITIONAL_ONLY) for p in params)
+
 
 class AudioHandler:
     """Manages audio recording, playback, and processing."""
@@ -37,9 +240,12 @@ class AudioHandler:
 
         Args:
             log_callback: A function to call for logging messages (e.g., self.log from the GUI class).
+                          If it accepts `exc_info`, tracebacks are passed through it.
         """
         self.log = log_callback # Use the passed-in logging function
-        self.chunk = 1024       # Size of audio chunks read/written at a time
+        self._log_takes_exc_info = _accepts_keyword(log_callback, 'exc_info')
+        self.chunk = 1024       # Size of audio chunks read/written at a time (grows on xruns)
+        self._xruns = 0         # Over/underflows reported by the current stream's callback
         self.format = pyaudio.paInt16 # Audio format (16-bit integers)
         self.channels = 1       # Mono audio
         # Use only the injected config (or empty dict) to avoid module-level state.
@@ -60,21 +266,45 @@ class AudioHandler:
             self.default_quality = DEFAULT_AUDIO_CONFIG["default_quality"]
             self.log("Audio quality rates missing in config. Using defaults.", logging.WARNING)
 
+        self.quality_keys = tuple(self.quality_rates) # Fixed menu order for the quality chooser
         self.rate = self.quality_rates.get(self.default_quality, 11025) # Current sample rate, fallback
+        self.quality_codecs = audio_section.get("codecs", DEFAULT_AUDIO_CONFIG["codecs"])
+        self.normalize = bool(audio_section.get("normalize", DEFAULT_AUDIO_CONFIG["normalize"]))
+
+        # --- Optional zstd dictionary for short voice payloads ---
+        self._zstd_dict_cctx = None
+        self._zstd_dict_dctx = None
+        dict_path = audio_section.get("zstd_dict_path")
+        if dict_path:
+            self._load_zstd_dict(dict_path)
 
         # --- Recording State from Config ---
         self.record_seconds = audio_section.get("default_length_sec", DEFAULT_AUDIO_CONFIG["default_length_sec"])
         self.recording = False  # Flag indicating if recording is active
-        self.frames = []        # Buffer to store recorded audio frames
+        self._rec_buf = None    # Byte view of the preallocated buffer for the active recording
+        self._rec_pos = 0       # Number of bytes written into _rec_buf
+        self._rec_dropped = 0   # Blocks that arrived after _rec_buf was full
+        self._rec_done = threading.Event() # Set when the callback has returned paComplete
+        self._stream_pool = {}  # Stopped input streams keyed by (rate, channels, chunk), reused across recordings
 
         # --- Playback State ---
         self.playing = False    # Flag indicating if playback is active
-        self.wf = None          # Wave file object for playback
+        self.playback_done = threading.Event() # Set when the playback stream completes or is stopped
+        self.wf = None          # Wave file object for playback (header/format info)
+        self._play_file = None  # Open file backing the playback mapping
+        self._mm = None         # Read-only mmap of the playback file
+        self._play_pos = 0      # Byte offset of the next frame to play
+        self._play_end = 0      # Byte offset just past the last sample
+        self._frame_bytes = 0   # Bytes per frame of the playback file
+        self._silence = b''     # One buffer of silence, sized when playback starts
 
         # --- PyAudio Instance and Stream ---
         try:
             self.p = pyaudio.PyAudio() # Initialize PyAudio
             self.stream = None         # PyAudio stream object, managed in start/stop methods
+            # Constant per format/width; looked up once instead of per recording/playback
+            self._sample_size = self.p.get_sample_size(self.format)
+            self._width_to_fmt = {w: self.p.get_format_from_width(w) for w in (1, 2, 3, 4)}
         except Exception as e:
             self.log(f"FATAL: Failed to initialize PyAudio: {e}", logging.CRITICAL)
             self.p = None # Indicate PyAudio failed
@@ -88,6 +318,30 @@ class AudioHandler:
         self.log(f"AudioHandler initialized. Default Quality: {self.default_quality} ({self.rate}Hz), Default Length: {self.record_seconds}s")
 
 
+    def _log_exception(self, message: str):
+        """Log `message` at ERROR with the traceback of the exception being handled."""
+        if self._log_takes_exc_info:
+            self.log(message, logging.ERROR, exc_info=True) # Formatted only if the record is emitted
+        else:
+            self.log(message, logging.ERROR)
+            self.log(traceback.format_exc(), logging.ERROR)
+
+    def _load_zstd_dict(self, dict_path: str):
+        """Load a trained zstd dictionary and build the matching compression contexts."""
+        if zstd is None:
+            self.log(f"zstd dictionary '{dict_path}' configured but 'zstandard' is not installed. Ignoring.", logging.WARNING)
+            return
+        try:
+            with open(dict_path, 'rb') as f:
+                zdict = zstd.ZstdCompressionDict(f.read())
+            self._zstd_dict_cctx = zstd.ZstdCompressor(level=ZSTD_LEVEL, dict_data=zdict, write_checksum=False)
+            self._zstd_dict_dctx = zstd.ZstdDecompressor(dict_data=zdict)
+            self.log(f"Loaded zstd dictionary from {dict_path} (ID {zdict.dict_id()})")
+        except (OSError, zstd.ZstdError) as e:
+            self.log(f"Could not load zstd dictionary '{dict_path}': {e}. Compressing without it.", logging.WARNING)
+            self._zstd_dict_cctx = None
+            self._zstd_dict_dctx = None
+
     def set_recording_params(self, seconds_str: str, quality: str) -> int:
         """
         Set recording length and quality (sample rate).
@@ -126,10 +380,14 @@ class AudioHandler:
 
         return self.record_seconds # Return the potentially clamped value
 
-    def start_recording(self) -> tuple[bool, str | None]:
+    def start_recording(self, on_auto_stop=None) -> tuple[bool, str | None]:
         """
         Start audio recording using a non-blocking stream callback.
 
+        Args:
+            on_auto_stop: Optional callable(saved: bool, filepath: str), called from the
+                          timer thread when the recording is stopped at its length limit.
+
         Returns:
             A tuple (success: bool, filepath: str | None).
             Filepath is the path where the recording will be saved if successful.
@@ -141,23 +399,33 @@ class AudioHandler:
             self.log("Already recording.", logging.WARNING)
             return False, None
 
+        # Preallocate the whole recording up front (plus one callback buffer of
+        # slack for timer jitter) so the callback only copies into place.
+        nbytes = (self.rate * self.record_seconds + self.chunk) * self.channels * self._sample_size
+        self._rec_buf = memoryview(bytearray(nbytes))
+        self._rec_pos = 0
+        self._rec_dropped = 0
+        self._rec_done.clear()
+        self._xruns = 0
         self.recording = True
-        self.frames = [] # Clear buffer for new recording
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         # Ensure filepath is unique even if clock resolution is low
         filepath = os.path.join(self.voice_message_dir, f"recording_{timestamp}_{uuid.uuid4().hex[:6]}.wav")
 
         try:
-            self.stream = self.p.open(format=self.format,
-                                      channels=self.channels,
-                                      rate=self.rate,
-                                      input=True,
-                                      frames_per_buffer=self.chunk,
-                                      stream_callback=self._recording_callback)
-            self.log(f"Recording for {self.record_seconds} seconds at {self.rate}Hz...")
+            # Reopening the device costs tens of ms on some hosts; restart a pooled stream if one matches
+            self.stream = self._stream_pool.pop((self.rate, self.channels, self.chunk), None)
+            if self.stream is None:
+                self.stream = self.p.open(format=self.format,
+                                          channels=self.channels,
+                                          rate=self.rate,
+                                          input=True,
+                                          frames_per_buffer=self.chunk,
+                                          stream_callback=self._recording_callback)
+            self.log(f"Recording for {self.record_seconds} seconds at {self.rate}Hz (buffer {self.chunk} frames)...")
             self.stream.start_stream()
             # Ensure stream is closed after recording and file is written
-            threading.Timer(self.record_seconds, self.stop_recording, args=(filepath,)).start()
+            threading.Timer(self.record_seconds, self._auto_stop, args=(filepath, on_auto_stop)).start()
             return True, filepath
         except OSError as e:
              self.log(f"OS Error starting recording stream (device issue?): {e}", logging.ERROR)
@@ -174,12 +442,34 @@ class AudioHandler:
 
     def _recording_callback(self, in_data, frame_count, time_info, status):
         """Internal callback for the PyAudio recording stream."""
+        if status & _INPUT_XRUN_FLAGS:
+            self._xruns += 1
         if self.recording:
-            self.frames.append(in_data)
-            return (in_data, pyaudio.paContinue)
+            # Keep the audio thread cheap: one memcpy into the preallocated
+            # buffer, no per-block Python objects, locks or logging.
+            buf = self._rec_buf
+            pos = self._rec_pos
+            end = pos + len(in_data)
+            if end <= len(buf):
+                buf[pos:end] = in_data
+                self._rec_pos = end
+                return (in_data, pyaudio.paContinue)
+            # Buffer full (stop is late): memory stays capped; end the stream
+            self._rec_dropped += 1
+            self._rec_done.set()
+            return (in_data, pyaudio.paComplete)
         else:
+            self._rec_done.set()
             return (in_data, pyaudio.paComplete)
 
+    def _auto_stop(self, filepath: str, on_auto_stop):
+        """Timer thread: stop the recording at its length limit and report the outcome."""
+        if not self.recording:
+            return # Already stopped (manually or by cleanup)
+        saved = self.stop_recording(filepath)
+        if on_auto_stop:
+            on_auto_stop(saved, filepath)
+
     def stop_recording(self, filepath: str) -> bool:
         """
         Stop the audio recording stream and save the buffered frames to a WAV file.
@@ -194,40 +484,53 @@ class AudioHandler:
             return False
 
         self.recording = False # Signal the callback to complete
-        time.sleep(0.05) # Small allow for last callback
 
-        if self.stream:
+        key = (self.rate, self.channels, self.chunk)
+        stream, self.stream = self.stream, None
+        if stream:
             try:
-                if self.stream.is_active(): self.stream.stop_stream()
-                self.stream.close()
-                self.log("Recording stream stopped and closed.")
+                # Wait for the callback to deliver its last block and return paComplete;
+                # it runs once per buffer, so a couple of buffer periods is plenty.
+                if stream.is_active():
+                    self._rec_done.wait(timeout=2 * self.chunk / self.rate + 0.1)
+                # Always stop: after the callback returns paComplete the stream is inactive but not
+                # stopped, and start_stream() on a pooled stream in that state would not restart it
+                stream.stop_stream()
             except Exception as e:
-                self.log(f"Error stopping/closing recording stream: {e}", logging.WARNING)
-            finally:
-                self.stream = None
+                self.log(f"Error stopping recording stream: {e}", logging.WARNING)
+                self._close_stream(stream)
+                stream = None
+        self._tune_buffer_size()
+        if self._rec_dropped:
+            self.log(f"Recording buffer full; dropped {self._rec_dropped} late block(s)", logging.WARNING)
+        if stream:
+            if key[2] == self.chunk:
+                self._stream_pool[key] = stream # Keep it open for the next recording
+                self.log("Recording stream stopped.")
+            else:
+                self._close_stream(stream) # Buffer size changed; a new stream is needed
+                self.log("Recording stream stopped and closed.")
 
-        if not self.frames:
+        if self._rec_buf is None or not self._rec_pos:
             self.log("No frames recorded.", logging.WARNING)
+            self._rec_buf = None
             return False
 
         # --- Save the recording ---
         try:
-            with wave.open(filepath, 'wb') as wf:
-                wf.setnchannels(self.channels)
-                wf.setsampwidth(self.p.get_sample_size(self.format))
-                wf.setframerate(self.rate)
-                wf.writeframes(b''.join(self.frames))
+            _write_wav(filepath, self.channels, self._sample_size, self.rate,
+                       self._rec_buf[:self._rec_pos])
             self.log(f"Recording successfully saved to {filepath}")
-            self.frames = []
             return True
-        except wave.Error as e:
-             self.log(f"Wave library error saving recording to {filepath}: {e}", logging.ERROR)
+        except OSError as e:
+             self.log(f"OS error saving recording to {filepath}: {e}", logging.ERROR)
              return False
         except Exception as e:
             self.log(f"Unexpected error saving recording to {filepath}: {e}", logging.ERROR)
             return False
         finally:
-            self.frames = [] # Clear buffer even on failure
+            self._rec_buf = None # Release buffer even on failure
+            self._rec_pos = 0
 
 
     def start_playback(self, filepath: str) -> bool:
@@ -251,49 +554,63 @@ class AudioHandler:
             return False
 
         self.playing = True
+        self.playback_done.clear()
+        self._xruns = 0
         try:
-            self.wf = wave.open(filepath, 'rb')
-            self.stream = self.p.open(format=self.p.get_format_from_width(self.wf.getsampwidth()),
+            self._play_file = open(filepath, 'rb')
+            self.wf = wave.open(self._play_file)
+            # wave leaves the file positioned at the start of the 'data' chunk
+            self._frame_bytes = self.wf.getsampwidth() * self.wf.getnchannels()
+            # 8-bit WAV is unsigned, so its silence is 0x80 rather than 0x00
+            self._silence = (b'\x80' if self.wf.getsampwidth() == 1 else b'\x00') * (self.chunk * self._frame_bytes)
+            self._play_pos = self._play_file.tell()
+            self._mm = mmap.mmap(self._play_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._play_end = min(self._play_pos + self.wf.getnframes() * self._frame_bytes, len(self._mm))
+            self.stream = self.p.open(format=self._width_to_fmt[self.wf.getsampwidth()],
                                       channels=self.wf.getnchannels(),
                                       rate=self.wf.getframerate(),
                                       output=True,
                                       frames_per_buffer=self.chunk,
                                       stream_callback=self._playback_callback)
-            self.log(f"Playing {os.path.basename(filepath)}...")
+            self.log(f"Playing {os.path.basename(filepath)} (buffer {self.chunk} frames)...")
             self.stream.start_stream()
             return True
         except wave.Error as e:
              self.log(f"Error opening WAV file {filepath}: {e}. Corrupted or invalid format?", logging.ERROR)
              self.playing = False
-             if self.wf: self.wf.close()
-             self.wf = None
+             self._close_playback_file()
              if self.stream: self.stream.close()
              self.stream = None
              return False
         except OSError as e:
              self.log(f"OS Error starting playback stream (device issue?): {e}", logging.ERROR)
              self.playing = False
-             if self.wf: self.wf.close()
-             self.wf = None
+             self._close_playback_file()
              if self.stream: self.stream.close()
              self.stream = None
              return False
         except Exception as e:
             self.log(f"Error starting playback stream for {filepath}: {e}", logging.ERROR)
             self.playing = False
-            if self.wf: self.wf.close()
-            self.wf = None
+            self._close_playback_file()
             if self.stream: self.stream.close()
             self.stream = None
             return False
 
     def _playback_callback(self, in_data, frame_count, time_info, status):
         """Internal callback for the PyAudio playback stream."""
-        if not self.playing or not self.wf:
+        if status & pyaudio.paOutputUnderflow:
+            self._xruns += 1
+        mm = self._mm
+        if not self.playing or mm is None:
+            self.playback_done.set()
             return (None, pyaudio.paComplete)
 
         try:
-            data = self.wf.readframes(frame_count)
+            pos = self._play_pos
+            end = min(pos + frame_count * self._frame_bytes, self._play_end)
+            data = mm[pos:end]
+            self._play_pos = end
         except Exception as e:
              self.log(f"Error reading frames during playback: {e}", logging.ERROR)
              data = b'' # Treat as end of file on error
@@ -301,11 +618,12 @@ class AudioHandler:
         playback_status = pyaudio.paContinue if data else pyaudio.paComplete
         if not self.playing and playback_status == pyaudio.paContinue:
              playback_status = pyaudio.paComplete
-             # Calculate silence bytes needed
-             bytes_per_frame = self.wf.getsampwidth() * self.wf.getnchannels()
-             silence = b'\x00' * (frame_count * bytes_per_frame)
-             data = silence
+             # Reuse the preallocated silence buffer; no allocation in the callback
+             n = frame_count * self._frame_bytes
+             data = self._silence if n == len(self._silence) else self._silence[:n]
 
+        if playback_status == pyaudio.paComplete:
+            self.playback_done.set()
         return (data, playback_status)
 
     def stop_playback(self):
@@ -313,6 +631,7 @@ class AudioHandler:
         if not self.playing:
             return
         self.playing = False
+        self.playback_done.set() # Release waiters even if the stream has stalled
         self.log("Playback stop requested.")
 
     def playback_finished(self):
@@ -333,10 +652,37 @@ class AudioHandler:
                 self.log(f"Error stopping/closing playback stream during cleanup: {e}", logging.WARNING)
             finally:
                 self.stream = None
-        if self.wf:
-            try: self.wf.close()
-            except Exception as e: self.log(f"Error closing wave file during cleanup: {e}", logging.WARNING)
-            finally: self.wf = None
+            self._tune_buffer_size()
+        self._close_playback_file()
+
+    def _close_playback_file(self):
+        """Release the playback mapping, wave reader and file."""
+        for attr in ('_mm', 'wf', '_play_file'):
+            obj = getattr(self, attr)
+            if obj is None:
+                continue
+            try: obj.close()
+            except Exception as e: self.log(f"Error closing {attr.lstrip('_')} during cleanup: {e}", logging.WARNING)
+            finally: setattr(self, attr, None)
+
+    def _close_stream(self, stream):
+        """Close a PyAudio stream, logging (not raising) any error."""
+        try:
+            stream.close()
+        except Exception as e:
+            self.log(f"Error closing audio stream: {e}", logging.WARNING)
+
+    def _tune_buffer_size(self):
+        """Double frames_per_buffer for the next stream if the last one kept over/underrunning."""
+        if self._xruns >= XRUN_THRESHOLD and self.chunk < MAX_CHUNK:
+            self.chunk = min(self.chunk * 2, MAX_CHUNK)
+            self.log(f"{self._xruns} audio over/underruns; buffer raised to {self.chunk} frames", logging.WARNING)
+            # Pooled streams with the old buffer size would never be reused; don't leave their devices open
+            for key in [key for key in self._stream_pool if key[2] != self.chunk]:
+                self._close_stream(self._stream_pool.pop(key))
+        elif self._xruns:
+            self.log(f"{self._xruns} audio over/underruns (buffer {self.chunk} frames)", logging.DEBUG)
+        self._xruns = 0
 
     def compress_audio(self, wav_path: str, quality: str) -> bytes | None:
         """
@@ -365,43 +711,84 @@ class AudioHandler:
             if original_rate > target_rate:
                 self.log(f"Downsampling from {original_rate}Hz to {target_rate}Hz...")
                 try:
-                    current_frames, _ = audioop.ratecv(frames, original_sample_width, channels,
-                                                       original_rate, target_rate, None)
+                    if resample_poly is not None and original_sample_width == 2:
+                        current_frames = _resample_pcm16(frames, channels, original_rate, target_rate)
+                    else:
+                        current_frames, _ = audioop.ratecv(frames, original_sample_width, channels,
+                                                           original_rate, target_rate, None)
                     current_rate = target_rate
                     self.log(f"Downsampled size: {len(current_frames)} bytes")
-                except audioop.error as e:
-                    self.log(f"Audioop error during downsampling: {e}. Skipping.", logging.WARNING)
+                except (audioop.error, ValueError) as e:
+                    self.log(f"Error during downsampling: {e}. Skipping.", logging.WARNING)
                     current_frames = frames
                     current_rate = original_rate
             else:
                  self.log("Skipping downsampling (Original rate <= Target rate)")
 
-            # --- 4. Reduce Bit Depth (Optional: Only for Ultra Low) ---
+            # --- 3b. Normalize level (optional, 16-bit only) ---
+            if self.normalize and original_sample_width == 2:
+                current_frames = _normalize_pcm16(current_frames)
+                self.log("Normalized peak level")
+
+            # --- 4. Encode Samples (codec chosen per quality) ---
+            codec = self.quality_codecs.get(quality, CODEC_PCM)
+            if codec not in SUPPORTED_CODECS:
+                self.log(f"Unknown codec '{codec}' for quality '{quality}'. Using '{CODEC_PCM}'.", logging.WARNING)
+                codec = CODEC_PCM
             current_sample_width = original_sample_width
-            if quality == "Ultra Low" and original_sample_width > 1:
-                self.log("Converting to 8-bit for Ultra Low quality...")
+            if codec == CODEC_ULAW and original_sample_width == 2:
+                self.log(f"Encoding as 8-bit µ-law for {quality} quality...")
+                current_frames = _pcm16_to_ulaw(current_frames)
+                current_sample_width = 1
+                self.log(f"Size after µ-law encoding: {len(current_frames)} bytes")
+            elif codec == CODEC_ADPCM and original_sample_width == 2 and channels == 1:
+                self.log(f"Encoding as 4-bit IMA ADPCM for {quality} quality...")
+                current_frames = _pcm16_to_adpcm(current_frames)
+                # Header width stays 2: it describes the PCM the receiver decodes to
+                self.log(f"Size after ADPCM encoding: {len(current_frames)} bytes")
+            elif codec == CODEC_PCM8 and original_sample_width > 1:
+                self.log(f"Converting to 8-bit for {quality} quality...")
                 try:
-                    current_frames = audioop.lin2lin(current_frames, original_sample_width, 1)
+                    if original_sample_width == 2:
+                        current_frames = _pcm16_to_u8(current_frames)
+                    else:
+                        # 8-bit WAV samples are unsigned; lin2lin yields signed bytes
+                        current_frames = audioop.bias(audioop.lin2lin(current_frames, original_sample_width, 1), 1, 128)
                     current_sample_width = 1
                     self.log(f"Size after 8-bit conversion: {len(current_frames)} bytes")
                 except audioop.error as e:
                      self.log(f"Audioop error during bit depth reduction: {e}. Skipping.", logging.WARNING)
+                     codec = CODEC_PCM
             else:
+                 codec = CODEC_PCM
                  self.log(f"Keeping original bit depth ({current_sample_width*8}-bit)")
 
             # --- 5. Create Header ---
-            header_str = f"{current_rate},{channels},{current_sample_width}"
-            header_bytes = header_str.encode('utf-8')
-            header_size = len(header_bytes)
-            if header_size > 255:
-                raise ValueError(f"Header size ({header_size}) exceeds 1 byte limit.")
-
-            data_with_header = struct.pack('!B', header_size) + header_bytes + current_frames
-            self.log(f"Created header: '{header_str}' ({header_size} bytes)")
-
-            # --- 6. Compress with zlib ---
-            self.log("Compressing data with zlib (level 9)...")
-            compressed_data = zlib.compress(data_with_header, level=9)
+            header_bytes = AUDIO_HEADER.pack(current_rate, channels, current_sample_width, _CODEC_IDS[codec])
+            self.log(f"Created header: {current_rate}Hz, {channels}ch, {current_sample_width*8}-bit, {codec} ({AUDIO_HEADER.size} bytes)")
+
+            # --- 6. Compress (zstd when available, zlib otherwise) ---
+            # Header and samples are streamed into one compressor, so they are
+            # never joined into an intermediate buffer.
+            dict_cctx = self._zstd_dict_cctx
+            if dict_cctx is not None or _ZSTD_CCTX is not None:
+                tag = COMPRESSION_ZSTD_DICT if dict_cctx is not None else COMPRESSION_ZSTD
+                self.log(f"Compressing data with zstd{' + dictionary' if dict_cctx is not None else ''} (level {ZSTD_LEVEL})...")
+                with _ZSTD_CCTX_LOCK: # The compressobj borrows the shared context until flushed
+                    # The content size goes in the frame header; the one-shot decoder requires it
+                    cobj = (dict_cctx or _ZSTD_CCTX).compressobj(size=len(header_bytes) + len(current_frames))
+                    out = bytearray((tag,))
+                    out += cobj.compress(header_bytes)
+                    out += cobj.compress(current_frames)
+                    out += cobj.flush()
+            else:
+                self.log(f"Compressing data with raw deflate (level {ZLIB_LEVEL})...")
+                cobj = _DEFLATE_TEMPLATE.copy() # A private copy per call, so no lock is needed
+                out = bytearray((COMPRESSION_DEFLATE,))
+                out += cobj.compress(header_bytes)
+                out += cobj.compress(current_frames)
+                out += cobj.flush()
+            compressed_data = bytes(out)
 
             compressed_size = len(compressed_data)
             if original_size > 0:
@@ -419,57 +806,58 @@ class AudioHandler:
             self.log(f"Error reading WAV file '{os.path.basename(wav_path)}': {e}", logging.ERROR)
             return None
         except Exception as e:
-            self.log(f"Unexpected error during audio compression for '{os.path.basename(wav_path)}': {e}", logging.ERROR)
-            import traceback
-            self.log(traceback.format_exc(), logging.ERROR)
+            self._log_exception(f"Unexpected error during audio compression for '{os.path.basename(wav_path)}': {e}")
             return None
 
     def create_wav_from_compressed(self, compressed_data: bytes, filename: str) -> bool:
         """
-        Decompress zlib data, parse the prepended header, and create a WAV file.
+        Decompress a tagged (zstd/zlib) payload, parse the prepended header, and create a WAV file.
         """
         self.log(f"Decompressing and creating WAV file: {filename}")
         try:
-            # --- 1. Decompress zlib data ---
-            data_with_header = zlib.decompress(compressed_data)
+            # --- 1. Decompress payload ---
+            # A memoryview lets the tag strip below slice without copying (bytes, bytearray or a view all work)
+            data_with_header, is_legacy = _decompress_payload(memoryview(compressed_data), self._zstd_dict_dctx)
 
             # --- 2. Parse Header ---
-            header_size = struct.unpack('!B', data_with_header[0:1])[0]
-            header_bytes = data_with_header[1 : 1 + header_size]
-            audio_data = data_with_header[1 + header_size :]
-            header_str = header_bytes.decode('utf-8')
-            header_parts = header_str.split(',')
-            if len(header_parts) != 3:
-                raise ValueError(f"Invalid header format after decompression: '{header_str}'")
-
-            sample_rate = int(header_parts[0])
-            channels = int(header_parts[1])
-            sample_width = int(header_parts[2])
-            self.log(f"Parsed Header - Rate: {sample_rate}, Channels: {channels}, Width: {sample_width}")
+            if is_legacy:
+                sample_rate, channels, sample_width, codec, audio_data = _parse_legacy_header(data_with_header)
+            else:
+                sample_rate, channels, sample_width, codec_id = AUDIO_HEADER.unpack_from(data_with_header)
+                audio_data = memoryview(data_with_header)[AUDIO_HEADER.size:]
+                codec = _CODEC_NAMES.get(codec_id)
+                if codec is None:
+                    raise ValueError(f"Unsupported codec id {codec_id}")
+            self.log(f"Parsed Header - Rate: {sample_rate}, Channels: {channels}, Width: {sample_width}, Codec: {codec}")
+            # The raw WAV writer does not validate; reject what wave.open would have
+            if sample_rate < 1 or channels < 1 or not 1 <= sample_width <= 4:
+                raise ValueError(f"Invalid audio parameters in header: {sample_rate}Hz, {channels}ch, {sample_width}-byte")
+
+            if codec == CODEC_ULAW:
+                audio_data = _ulaw_to_pcm16(audio_data)
+                sample_width = 2
+            elif codec == CODEC_ADPCM:
+                if channels != 1 or sample_width != 2:
+                    raise ValueError(f"ADPCM payload must be mono 16-bit, got {channels}ch {sample_width}-byte")
+                audio_data = _adpcm_to_pcm16(audio_data)
 
             # --- 3. Create WAV file ---
-            with wave.open(filename, 'wb') as wf:
-                wf.setnchannels(channels)
-                wf.setsampwidth(sample_width)
-                wf.setframerate(sample_rate)
-                wf.writeframes(audio_data)
+            _write_wav(filename, channels, sample_width, sample_rate, audio_data)
 
             self.log(f"Successfully created WAV file: {filename}")
             return True
 
-        except zlib.error as e:
-            self.log(f"Zlib decompression error for {filename}: {e}", logging.ERROR)
+        except _DECOMPRESS_ERRORS as e:
+            self.log(f"Decompression error for {filename}: {e}", logging.ERROR)
             return False
         except (struct.error, ValueError, IndexError, UnicodeDecodeError) as e:
             self.log(f"Error parsing header or data for {filename}: {e}", logging.ERROR)
             return False
-        except wave.Error as e:
+        except OSError as e:
              self.log(f"Error writing WAV file {filename}: {e}", logging.ERROR)
              return False
         except Exception as e:
-            self.log(f"Unexpected error creating WAV file {filename}: {e}", logging.ERROR)
-            import traceback
-            self.log(traceback.format_exc(), logging.ERROR)
+            self._log_exception(f"Unexpected error creating WAV file {filename}: {e}")
             return False
 
     def cleanup(self):
@@ -487,11 +875,15 @@ class AudioHandler:
                         pass
                     finally:
                         self.stream = None
-                self.frames = []
+                self._rec_buf = None
+                self._rec_pos = 0
                 self.log("Recording aborted during cleanup; frames discarded.")
             except Exception as e:
                 self.log(f"Error aborting recording during cleanup: {e}", logging.WARNING)
         if self.playing: self.stop_playback()
+        for stream in self._stream_pool.values():
+            self._close_stream(stream)
+        self._stream_pool.clear()
 
         if self.p:
             try:
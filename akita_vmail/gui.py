@@ -12,16 +12,20 @@ import threading
 import time
 import logging
 import os
-from datetime import datetime
+import collections
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 
 # Local utilities and components (explicit imports)
-from .utils import log_to_gui, add_tooltip, setup_logging_queue, clear_scrolled_text
+from .utils import LOG_MAX_LINES, log_lines_to_gui, add_tooltip, setup_logging_queue, clear_scrolled_text, is_scrolled_to_end, format_timestamp
 from .protocol import (
     MSG_TYPE_VOICE_CHUNK, MSG_TYPE_ACK, MSG_TYPE_TEST, MSG_TYPE_COMPLETE_VOICE,
-    verify_chunk_crc, verify_complete_voice_crc, get_chunk_sizes, get_default_chunk_size_key, get_chunk_timeout
+    verify_chunk_crc, verify_complete_voice_crc, get_chunk_sizes, get_default_chunk_size_key, get_chunk_timeout,
+    get_reassembly_limits, MAX_CHUNKS_PER_MESSAGE
 )
 from .audio_handler import AudioHandler
-from .meshtastic_handler import MeshtasticHandler
+from .meshtastic_handler import MeshtasticHandler, ConnectionStatus
 from .style_helper import setup_styles
 from .header_panel import HeaderPanel
 from .connection_panel import ConnectionPanel
@@ -32,6 +36,17 @@ from .log_panel import LogPanel
 from .status_panel import StatusPanel
 
 
+WORKER_THREADS = 4  # Shared pool for blocking record/play/send work (playback holds one for its duration)
+MAX_LISTED_MESSAGES = 500 # Oldest message rows are dropped beyond this
+RECENT_COMPLETED_IDS = 32 # Reassembled message IDs remembered so a retransmitted final chunk is still ACKed
+LOG_FLUSH_MAX = 200 # Lines written to the GUI log per Tk callback; the rest go in a follow-up
+LOG_DEBUG_FLUSH_MS = 250 # DEBUG-only batches wait this long so per-chunk traces share one insert
+LOG_PENDING_HIGH = 1000 # GUI log backlog at which DEBUG lines are shed instead of queued
+STATUS_FLUSH_MS = 30 # Status bar updates are coalesced over this window
+RX_DRAIN_MAX = 32    # Received messages handled per Tk callback during a burst
+RX_DRAIN_PAUSE_MS = 5 # Gap between those batches so the UI stays responsive
+
+
 class AkitaVmailApp:
     """Main application class for Akita vMail."""
 
@@ -41,14 +56,45 @@ class AkitaVmailApp:
 
         # State
         self.is_connected = False
-        self.message_chunks: dict = {}
-        self.voice_messages: list = []
+        self.message_chunks = collections.OrderedDict() # chunk_id -> reassembly state, least recently active first
+        self._reasm_bytes = 0 # Total size of the reassembly buffers in message_chunks
+        self._completed_ids = collections.deque(maxlen=RECENT_COMPLETED_IDS) # Reassembled chunk_ids, to re-ACK late retransmits
+        # Parallel per-row columns for messages_list (the row text itself lives only in the Listbox)
+        self._msg_path = collections.deque(maxlen=MAX_LISTED_MESSAGES) # Audio file, or None for text rows
+        self._msg_from = collections.deque(maxlen=MAX_LISTED_MESSAGES) # Sender node ID ("Me" for own recordings)
         self.current_recording_path: str | None = None
+        self._has_recording = False # current_recording_path has been saved (avoids a stat per UI refresh)
         self.com_ports: list = []
+        self._chunk_check_after = None # Tk after() id of the pending check_incomplete_chunks, if any
+        self._expiry_heap: list = [] # (expiry_time, chunk_id); entries may be stale and are re-checked on pop
+        self._chunk_timeout = float(get_chunk_timeout(self.config)) # Seconds without a chunk before a message is dropped
+        self._max_pending_messages, self._max_pending_bytes = get_reassembly_limits(self.config)
+        self.chunk_sizes: dict = get_chunk_sizes(self.config) # Chunk-size key -> max payload bytes; config is fixed at startup
+        self.default_chunk_key = get_default_chunk_size_key(self.config)
+        self._ui_dirty = False # An idle _do_update_ui_state is already scheduled
+        self._pending_status: str | Callable[[], str] = "" # Latest update_status text (or factory) not yet shown
+        self._status_scheduled = False # A _flush_status call is queued on Tk
+        self._widget_state: dict = {} # widget -> options last applied via _set_widget
 
         # Logging queue and wiring
         self.log_queue = queue.Queue()
         setup_logging_queue(self.log_queue)
+        self._debug = logging.getLogger().isEnabledFor(logging.DEBUG) # Skip building DEBUG f-strings on the RX path otherwise
+        self._pending_log: list = []       # Formatted lines waiting for the Tk thread
+        self._log_lock = threading.Lock()  # Guards _pending_log and _log_flush_scheduled
+        self._log_flush_scheduled = False  # True while a _flush_log call is queued on Tk
+        self._log_flush_deferred = False   # That call is the delayed DEBUG-only one
+        self._rx_queue = collections.deque() # (msg_type, data, from_id, packet_id, verified) from the mesh thread
+        self._rx_lock = threading.Lock()     # Guards _rx_scheduled
+        self._rx_scheduled = False           # True while a _drain_rx call is queued on Tk
+        self._pending_rows: list = []           # Listbox rows waiting for the idle flush
+        self._rows_flush_scheduled = False      # True while _flush_message_rows is queued on Tk
+
+        # Blocking work runs here instead of on a new thread per operation
+        self._workers = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix="akita-worker")
+        # Received voice is decoded on one dedicated thread: keeps decompress/WAV writes off Tk, finishes
+        # messages in arrival order, and the shared zstd decompressor is never used from two threads at once
+        self._decode_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="akita-decode")
 
         # Create handlers (pass config and logging infrastructure)
         # MeshtasticHandler expects a log_queue and a receive_callback
@@ -56,9 +102,10 @@ class AkitaVmailApp:
             self.meshtastic_handler = MeshtasticHandler(self.log_queue, self.handle_received_message, self.config)
         except Exception:
             # If Meshtastic can't be created here, create a minimal stub to avoid crashes during GUI init
-            self.meshtastic_handler = type('Stub', (), {'is_connected': False, 'sending_active': False, 'get_available_ports': lambda *_: []})()
+            self.meshtastic_handler = type('Stub', (), {'is_connected': False, 'sending_active': False, 'get_available_ports': lambda *_, **__: []})()
 
         self.audio_handler = AudioHandler(self.log, self.config)
+        self._voice_dir = self.audio_handler.voice_message_dir # Fixed at startup; received files are written here
 
         # Apply styles (expects the app instance)
         try:
@@ -73,9 +120,6 @@ class AkitaVmailApp:
         self._log_listener_thread = threading.Thread(target=self._log_listener, daemon=True)
         self._log_listener_thread.start()
 
-        # Periodic chunk cleanup
-        self.master.after(1000, self.check_incomplete_chunks)
-
         # Window close handler
         try:
             self.master.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -84,39 +128,77 @@ class AkitaVmailApp:
 
     # --- Logging and helper ---
     def _log_listener(self):
+        """Block on the log queue and hand records to the Tk thread; a None record stops it."""
         fmt = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        while True:
+        stopping = False
+        while not stopping:
+            records = [self.log_queue.get()] # Sleeps until a record arrives (no polling)
+            # Take whatever else is already queued so a burst costs one lock round and one Tk callback
             try:
-                record = self.log_queue.get(timeout=0.5)
+                while True:
+                    records.append(self.log_queue.get_nowait())
             except queue.Empty:
-                # Stop if master is gone
+                pass
+            batch = []
+            urgent = False # Anything above DEBUG is shown right away
+            shed = len(self._pending_log) >= LOG_PENDING_HIGH # Tk is falling behind: DEBUG lines go first
+            shed_count = 0
+            for record in records:
+                if record is None:
+                    stopping = True
+                    break
+                if shed and record.levelno <= logging.DEBUG:
+                    shed_count += 1 # Not even formatted
+                    continue
                 try:
-                    if not self.master or not self.master.winfo_exists():
-                        break
+                    batch.append(fmt.format(record))
                 except Exception:
-                    break
+                    continue
+                urgent = urgent or record.levelno > logging.DEBUG
+            if shed_count:
+                batch.append(f"({shed_count} DEBUG lines not shown: GUI log is behind)")
+            if not batch:
                 continue
-            if record is None:
-                break
+            with self._log_lock:
+                pending = self._pending_log
+                pending.extend(batch)
+                if len(pending) > LOG_MAX_LINES:
+                    del pending[:len(pending) - LOG_MAX_LINES] # The widget would trim these right after inserting them
+                if self._log_flush_scheduled and not (urgent and self._log_flush_deferred):
+                    continue # A flush is already queued and will pick these lines up
+                self._log_flush_scheduled = True
+                self._log_flush_deferred = not urgent
             try:
-                text = fmt.format(record)
-                # Safely schedule GUI log update
-                try:
-                    if self.master and self.master.winfo_exists():
-                        self.master.after(0, log_to_gui, getattr(self, 'log_display', None), text)
-                except Exception:
-                    pass
+                self.master.after(0 if urgent else LOG_DEBUG_FLUSH_MS, self._flush_log)
             except Exception:
-                pass
-
-    def log(self, message: str, level=logging.INFO):
-        logging.log(level, message)
-        # Also show in GUI log if available
-        try:
-            if hasattr(self, 'log_display') and self.master and self.master.winfo_exists():
-                self.master.after(0, log_to_gui, self.log_display, f"{logging.getLevelName(level)}: {message}")
-        except Exception:
-            pass
+                break # Tk is gone
+
+    def _flush_log(self):
+        """Tk thread: write queued lines in one insert, at most LOG_FLUSH_MAX per call."""
+        with self._log_lock:
+            lines = self._pending_log[:LOG_FLUSH_MAX]
+            del self._pending_log[:LOG_FLUSH_MAX]
+            more = bool(self._pending_log)
+            self._log_flush_scheduled = more
+            self._log_flush_deferred = False
+        log_lines_to_gui(getattr(self, 'log_display', None), lines)
+        if more:
+            self.master.after(0, self._flush_log) # Let Tk handle other events between batches
+
+    def _submit(self, fn, *args, pool: ThreadPoolExecutor | None = None):
+        """Run `fn(*args)` on the worker pool (or `pool`), logging any exception it raises."""
+        future = (pool or self._workers).submit(fn, *args)
+        future.add_done_callback(self._log_worker_error)
+        return future
+
+    def _log_worker_error(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            self.log(f"Background task failed: {future.exception()!r}", logging.ERROR)
+
+    def log(self, message: str, level=logging.INFO, exc_info=False):
+        # The root logger's QueueHandler routes this to the GUI log via _log_listener;
+        # with exc_info the traceback is only formatted if the record is actually emitted
+        logging.log(level, message, exc_info=exc_info)
 
     # --- UI Construction ---
     def create_widgets(self):
@@ -140,23 +222,64 @@ class AkitaVmailApp:
         StatusPanel(self.master, self)
 
     # --- UI update methods (existing logic preserved) ---
-    def update_status(self, message: str):
+    def update_status(self, message: str | Callable[[], str]):
+        """
+        Show `message` in the status bar; bursts within STATUS_FLUSH_MS collapse to the last one.
+        `message` may be a zero-argument callable so per-packet progress text is only formatted when shown.
+        """
         if self.master and self.master.winfo_exists():
             try:
                 if not hasattr(self, 'status_var'):
+                    if callable(message):
+                        message = message()
                     self.status_var = tk.StringVar(value=f"Status: {message}")
-                else:
-                    self.status_var.set(f"Status: {message}")
+                    return
+                self._pending_status = message
+                if not self._status_scheduled:
+                    self._status_scheduled = True
+                    self.master.after(STATUS_FLUSH_MS, self._flush_status)
             except Exception:
                 pass
 
+    def _flush_status(self):
+        self._status_scheduled = False
+        if not self.master or not self.master.winfo_exists():
+            return
+        cur = self.status_var.get() or ''
+        metrics = cur.find(' | Pending ACKs:') # Keep the suffix _do_update_ui_state maintains
+        message = self._pending_status
+        if callable(message):
+            message = message()
+        new_status = f"Status: {message}" + (cur[metrics:] if metrics >= 0 else '')
+        if new_status != cur:
+            self.status_var.set(new_status)
+
+    def _set_widget(self, widget, **options):
+        """Apply only the options that differ from what was last set on `widget`."""
+        applied = self._widget_state.setdefault(widget, {})
+        changed = {k: v for k, v in options.items() if applied.get(k) != v}
+        if changed:
+            widget.config(**changed)
+            applied.update(changed)
+
     def update_ui_state(self):
+        """Schedule one widget refresh for when Tk is idle; repeated calls before then coalesce."""
+        if self._ui_dirty:
+            return
+        self._ui_dirty = True
+        try:
+            self.master.after_idle(self._do_update_ui_state)
+        except Exception:
+            self._ui_dirty = False # Tk is gone
+
+    def _do_update_ui_state(self):
+        self._ui_dirty = False
         if not self.master or not self.master.winfo_exists() or not hasattr(self, 'connect_button'):
             return
         try:
             is_rec = getattr(self.audio_handler, 'recording', False)
             is_play = getattr(self.audio_handler, 'playing', False)
-            has_recording = self.current_recording_path and os.path.isfile(self.current_recording_path)
+            has_recording = self._has_recording
             is_sending = getattr(self.meshtastic_handler, 'sending_active', False)
 
             selection = getattr(self, 'messages_list', None).curselection() if hasattr(self, 'messages_list') else ()
@@ -164,30 +287,30 @@ class AkitaVmailApp:
             can_play_selection = False
             if has_selection:
                 idx = selection[0]
-                if 0 <= idx < len(self.voice_messages):
-                    can_play_selection = bool(self.voice_messages[idx].get("filepath"))
+                if 0 <= idx < len(self._msg_path):
+                    can_play_selection = bool(self._msg_path[idx])
 
             connect_state = tk.NORMAL if not self.is_connected else tk.DISABLED
-            self.connect_target_entry.config(state=connect_state)
-            self.connect_button.config(text="Disconnect" if self.is_connected else "Connect", state=tk.NORMAL)
+            self._set_widget(self.connect_target_entry, state=connect_state)
+            self._set_widget(self.connect_button, text="Disconnect" if self.is_connected else "Connect", state=tk.NORMAL)
 
             test_btn_state = tk.NORMAL if self.is_connected and not is_sending else tk.DISABLED
-            self.test_button.config(state=test_btn_state)
+            self._set_widget(self.test_button, state=test_btn_state)
 
             if is_rec:
-                self.record_button.config(text="⏹ Stop Rec", state=tk.NORMAL)
+                self._set_widget(self.record_button, text="⏹ Stop Rec", state=tk.NORMAL)
             else:
                 rec_btn_state = tk.NORMAL if self.is_connected and not is_play and not is_sending else tk.DISABLED
-                self.record_button.config(text="🎤 Record", state=rec_btn_state)
+                self._set_widget(self.record_button, text="🎤 Record", state=rec_btn_state)
 
             send_btn_state = tk.NORMAL if self.is_connected and has_recording and not is_rec and not is_play and not is_sending else tk.DISABLED
-            self.send_button.config(state=send_btn_state)
+            self._set_widget(self.send_button, state=send_btn_state)
 
             play_btn_state = tk.NORMAL if can_play_selection and not is_rec and not is_play and not is_sending else tk.DISABLED
-            self.play_button.config(state=play_btn_state)
+            self._set_widget(self.play_button, state=play_btn_state)
 
             stop_btn_state = tk.NORMAL if is_play else tk.DISABLED
-            self.stop_button.config(state=stop_btn_state)
+            self._set_widget(self.stop_button, state=stop_btn_state)
 
             # Update status bar metrics (non-intrusive: append to existing status message)
             try:
@@ -199,17 +322,19 @@ class AkitaVmailApp:
                     if cur.startswith(prefix):
                         base_msg = cur[len(prefix):].split(' | Pending ACKs:', 1)[0]
                         new_status = f"{prefix}{base_msg} | Pending ACKs: {pending} Retries: {retrans}"
-                        self.status_var.set(new_status)
+                        if new_status != cur:
+                            self.status_var.set(new_status) # Skip the variable trace/label redraw when nothing moved
             except Exception:
                 pass
 
         except Exception as e:
             self.log(f"Error updating UI state: {e}", logging.ERROR)
 
-    def refresh_ports(self):
+    def refresh_ports(self, force: bool = False):
+        """Refill the port list; a scan from the last few seconds is reused unless `force` is set."""
         self.log("Refreshing COM ports list...")
         try:
-            self.com_ports = self.meshtastic_handler.get_available_ports()
+            self.com_ports = self.meshtastic_handler.get_available_ports(force=force)
             current_target = self.connect_target_var.get() if hasattr(self, 'connect_target_var') else ''
             if not current_target or any(s in current_target.upper() for s in ["COM", "/DEV/TTY", "/DEV/CU."]):
                 if self.com_ports:
@@ -221,20 +346,17 @@ class AkitaVmailApp:
             self.log(f"Error refreshing ports: {e}", logging.ERROR)
 
     def update_chunk_size(self, event=None):
-        selected_key = getattr(self, 'chunk_size_var', tk.StringVar(value='')) and self.chunk_size_var.get()
-        try:
-            sizes = get_chunk_sizes(self.config)
-            if selected_key in sizes:
-                new_size = sizes[selected_key]
-                if new_size != getattr(self, 'max_chunk_size', None):
-                    self.max_chunk_size = new_size
-                    self.log(f"Max network payload size set to {selected_key} ({self.max_chunk_size} bytes)")
-                return
-            default_key = get_default_chunk_size_key(self.config)
-            self.chunk_size_var.set(default_key)
-            self.max_chunk_size = sizes.get(default_key, getattr(self, 'max_chunk_size', 180))
-        except Exception:
-            self.log(f"Invalid chunk size key: {selected_key}. Using default.", logging.WARNING)
+        selected_key = self.chunk_size_var.get() if hasattr(self, 'chunk_size_var') else ''
+        new_size = self.chunk_sizes.get(selected_key)
+        if new_size is not None:
+            if new_size != getattr(self, 'max_chunk_size', None):
+                self.max_chunk_size = new_size
+                self.log(f"Max network payload size set to {selected_key} ({self.max_chunk_size} bytes)")
+            return
+        self.log(f"Invalid chunk size key: {selected_key}. Using default.", logging.WARNING)
+        if hasattr(self, 'chunk_size_var'):
+            self.chunk_size_var.set(self.default_chunk_key)
+        self.max_chunk_size = self.chunk_sizes.get(self.default_chunk_key, getattr(self, 'max_chunk_size', 180))
 
     # --- Connection and Recording controls ---
     def toggle_connection(self):
@@ -250,7 +372,7 @@ class AkitaVmailApp:
                 messagebox.showerror("Error", "Please enter a COM Port or IP Address.")
                 return
             self.update_status(f"Connecting to {target}...")
-            self.connect_button.config(state=tk.DISABLED)
+            self._set_widget(self.connect_button, state=tk.DISABLED)
             try:
                 self.meshtastic_handler.connect(target)
             except Exception as e:
@@ -259,9 +381,9 @@ class AkitaVmailApp:
     def toggle_recording(self):
         if getattr(self.audio_handler, 'recording', False):
             self.update_status("Stopping recording...")
-            self.record_button.config(state=tk.DISABLED)
+            self._set_widget(self.record_button, state=tk.DISABLED)
             if self.current_recording_path:
-                threading.Thread(target=self._stop_recording_thread, args=(self.current_recording_path,), daemon=True).start()
+                self._submit(self._stop_recording_thread, self.current_recording_path)
             else:
                 self.log("Error: No recording path available.", logging.ERROR)
                 self.audio_handler.stop_recording("dummy_error.wav")
@@ -278,8 +400,9 @@ class AkitaVmailApp:
                 self.recording_length_var.set(str(clamped_seconds))
 
             self.update_status(f"Starting recording ({clamped_seconds}s)...")
-            self.record_button.config(state=tk.DISABLED)
-            success, filepath = self.audio_handler.start_recording()
+            self._set_widget(self.record_button, state=tk.DISABLED)
+            self._has_recording = False
+            success, filepath = self.audio_handler.start_recording(on_auto_stop=self._recording_auto_stopped)
             if success:
                 self.current_recording_path = filepath
                 self.log(f"Recording started. Output file: {filepath}")
@@ -296,11 +419,17 @@ class AkitaVmailApp:
         success = self.audio_handler.stop_recording(filepath)
         self.master.after(0, self._stop_recording_finished, success, filepath)
 
+    def _recording_auto_stopped(self, success: bool, filepath: str):
+        # AudioHandler's timer thread: the length limit was reached and the file written (or not)
+        self.log("Recording duration reached. Stopped automatically.")
+        self.master.after(0, self._stop_recording_finished, success, filepath)
+
     def _stop_recording_finished(self, success: bool, filepath: str):
         if success:
             self.log(f"Recording finished and saved: {filepath}")
-            desc = f"🎙️ My Recording @ {datetime.now().strftime('%H:%M:%S')}"
+            desc = f"🎙️ My Recording @ {format_timestamp('%H:%M:%S')}"
             self.add_message_to_list(desc, filepath, "Me")
+            self._has_recording = True
             self.update_status("Recording saved")
         else:
             self.log("Recording stopped, but failed to save.", logging.WARNING)
@@ -323,10 +452,32 @@ class AkitaVmailApp:
         elif not filepath:
             icon = "💬"
         full_description = f"{icon} {description}"
-        self.voice_messages.append({"description": full_description, "filepath": filepath, "from_id": from_id})
-        if hasattr(self, 'messages_list'):
-            self.messages_list.insert(tk.END, full_description)
-            self.messages_list.yview(tk.END)
+        if len(self._msg_path) == MAX_LISTED_MESSAGES:
+            self._drop_oldest_row() # The appends below evict the oldest entries; keep the Listbox in step
+        self._msg_path.append(filepath)
+        self._msg_from.append(from_id)
+        self._pending_rows.append(full_description) # Rows added before Tk goes idle share one insert
+        if not self._rows_flush_scheduled:
+            self._rows_flush_scheduled = True
+            try:
+                self.master.after_idle(self._flush_message_rows)
+            except Exception:
+                self._rows_flush_scheduled = False # Tk is gone
+
+    def _drop_oldest_row(self):
+        if hasattr(self, 'messages_list') and self.messages_list.size():
+            self.messages_list.delete(0)
+        elif self._pending_rows:
+            self._pending_rows.pop(0) # Oldest row has not reached the Listbox yet
+
+    def _flush_message_rows(self):
+        self._rows_flush_scheduled = False
+        rows, self._pending_rows = self._pending_rows, []
+        if rows and hasattr(self, 'messages_list'):
+            at_end = is_scrolled_to_end(self.messages_list) # Don't yank a user reading older messages
+            self.messages_list.insert(tk.END, *rows)
+            if at_end:
+                self.messages_list.yview(tk.END)
 
     def on_message_select(self, event=None):
         self.update_ui_state()
@@ -336,14 +487,13 @@ class AkitaVmailApp:
         if not selection:
             return
         index = selection[0]
-        if 0 <= index < len(self.voice_messages):
-            message_info = self.voice_messages[index]
-            filepath = message_info.get("filepath")
-            description = message_info.get("description")
+        if 0 <= index < len(self._msg_path):
+            filepath = self._msg_path[index]
+            description = self.messages_list.get(index)
             if filepath and os.path.isfile(filepath):
                 self.update_status(f"Playing: {description}")
                 self.update_ui_state()
-                threading.Thread(target=self._play_thread, args=(filepath,), daemon=True).start()
+                self._submit(self._play_thread, filepath)
             elif filepath:
                 self.log(f"Audio file not found: {filepath}", logging.ERROR)
                 messagebox.showerror("Playback Error", f"Audio file not found:\n{filepath}")
@@ -355,10 +505,8 @@ class AkitaVmailApp:
             self.log(f"Invalid selection index: {index}", logging.WARNING)
 
     def _play_thread(self, filepath: str):
-        success = self.audio_handler.start_playback(filepath)
-        if success:
-            while getattr(self.audio_handler, 'playing', False):
-                time.sleep(0.1)
+        if self.audio_handler.start_playback(filepath):
+            self.audio_handler.playback_done.wait() # Set on end of file or stop_playback
         self.master.after(0, self._playback_finished)
 
     def _playback_finished(self):
@@ -390,9 +538,9 @@ class AkitaVmailApp:
                 node_name = self.meshtastic_handler.interface.myInfo.long_name or f"!{self.meshtastic_handler.interface.myInfo.my_node_num:x}"
         except Exception:
             pass
-        message = f"Akita vMail test from {node_name} @ {datetime.now().strftime('%H:%M:%S')}"
+        message = f"Akita vMail test from {node_name} @ {format_timestamp('%H:%M:%S')}"
         self.update_ui_state()
-        threading.Thread(target=self._send_test_thread, args=(message,), daemon=True).start()
+        self._submit(self._send_test_thread, message)
 
     def _send_test_thread(self, message: str):
         success = False
@@ -407,6 +555,8 @@ class AkitaVmailApp:
             messagebox.showerror("Error", "Not connected.")
             return
         if not self.current_recording_path or not os.path.isfile(self.current_recording_path):
+            self._has_recording = False # Deleted behind our back
+            self.update_ui_state()
             messagebox.showerror("Error", "No valid recording available.")
             return
         if getattr(self.meshtastic_handler, 'sending_active', False):
@@ -420,10 +570,9 @@ class AkitaVmailApp:
         self.update_status(f"Preparing '{filename_short}'...")
         self.log(f"Initiating send: {filepath}, Quality: {quality}, ChunkKey: {getattr(self, 'chunk_size_var', None) and self.chunk_size_var.get()} ({getattr(self, 'max_chunk_size', 'unknown')} bytes)")
         self.update_ui_state()
-        threading.Thread(target=self._send_voice_thread, args=(filepath, quality), daemon=True).start()
+        self._submit(self._send_voice_thread, filepath, quality, filename_short)
 
-    def _send_voice_thread(self, filepath: str, quality: str):
-        filename_short = os.path.basename(filepath)
+    def _send_voice_thread(self, filepath: str, quality: str, filename_short: str):
         self.master.after(0, self.update_status, f"Compressing '{filename_short}' ({quality})...")
         compressed_data = self.audio_handler.compress_audio(filepath, quality)
 
@@ -434,9 +583,8 @@ class AkitaVmailApp:
             return
 
         data_len = len(compressed_data)
-        estimated_payload_len = data_len * 1.34 + 150
+        estimated_payload_len = (data_len + 2) // 3 * 4 + 150 # base64 size plus JSON envelope
         success = False
-        description = f"Voice message '{filename_short}' ({data_len} bytes compressed)"
 
         if estimated_payload_len > getattr(self, 'max_chunk_size', 180):
             self.master.after(0, self.update_status, f"Sending chunked: {filename_short} ({data_len} bytes)...")
@@ -446,12 +594,13 @@ class AkitaVmailApp:
                 success = False
         else:
             self.master.after(0, self.update_status, f"Sending complete: {filename_short} ({data_len} bytes)...")
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            timestamp = format_timestamp()
             try:
                 success = self.meshtastic_handler.send_complete_voice_message(compressed_data, timestamp)
             except Exception:
                 success = False
 
+        description = f"Voice message '{filename_short}' ({data_len} bytes compressed)"
         self.master.after(0, self._send_finished, success, description)
 
     def _send_finished(self, success: bool, description: str):
@@ -466,26 +615,74 @@ class AkitaVmailApp:
 
     # --- Receiving and chunk handling ---
     def handle_received_message(self, msg_type: str, data: any, from_id: str, packet_id: str):
+        """Mesh thread: queue the message; one Tk callback drains everything queued meanwhile."""
+        # base64 decode + CRC of voice payloads happens here so the Tk thread only dispatches
+        verified = None
+        if msg_type == 'data' and isinstance(data, dict):
+            payload_type = data.get('type')
+            if payload_type == MSG_TYPE_VOICE_CHUNK:
+                verified = verify_chunk_crc(data)
+            elif payload_type == MSG_TYPE_COMPLETE_VOICE:
+                verified = verify_complete_voice_crc(data)
+        self._rx_queue.append((msg_type, data, from_id, packet_id, verified))
+        with self._rx_lock:
+            if self._rx_scheduled:
+                return
+            self._rx_scheduled = True
         try:
-            self.master.after(0, self._process_received_message_mainthread, msg_type, data, from_id, packet_id)
+            self.master.after(0, self._drain_rx)
         except Exception:
             pass
 
-    def _process_received_message_mainthread(self, msg_type: str, data: any, from_id: str, packet_id: str):
-        self.log(f"GUI Thread: Processing {msg_type} from {from_id} (PktID: {packet_id})", logging.DEBUG)
+    def _send_chunk_ack(self, chunk_id: str, chunk_num: int, from_node: str):
+        """
+        ACK a chunk that is stored (or was already). The sender is stop-and-wait (one chunk in
+        flight), so the ACK is what releases its next chunk; it is sent for duplicates too, since a
+        retransmit means our earlier ACK was lost. The send runs on a worker so Tk never waits on the radio.
+        """
+        self._submit(self.meshtastic_handler.send_ack, chunk_id, chunk_num, from_node)
+
+    def _drain_rx(self):
+        with self._rx_lock:
+            self._rx_scheduled = False # Clear first so anything queued after this gets a new drain
+        popleft = self._rx_queue.popleft
+        process = self._process_received_message_mainthread
+        for _ in range(RX_DRAIN_MAX):
+            try:
+                item = popleft()
+            except IndexError:
+                break
+            process(*item)
+        if self._rx_queue:
+            # Still backlogged: pause briefly so Tk can redraw and handle input, then take the next batch
+            with self._rx_lock:
+                if self._rx_scheduled:
+                    return
+                self._rx_scheduled = True
+            try:
+                self.master.after(RX_DRAIN_PAUSE_MS, self._drain_rx)
+            except Exception:
+                pass
+
+    def _process_received_message_mainthread(self, msg_type: str, data: any, from_id: str, packet_id: str,
+                                              verified: tuple[bool, bytes | None] | None = None):
+        if self._debug:
+            self.log(f"GUI Thread: Processing {msg_type} from {from_id} (PktID: {packet_id})", logging.DEBUG)
 
         if msg_type == 'status':
-            full_status = str(data)
-            if "Connected: Node:" in full_status:
-                self.connected_node_info = full_status.split("Connected: ", 1)[1]
-                status_display = f"Connected: {self.connected_node_info}"
-            elif "Disconnected" in full_status or "Failed" in full_status:
+            state, detail = data
+            if state == ConnectionStatus.CONNECTED:
+                self.connected_node_info = detail or "N/A"
+                self.is_connected = True
+                self.update_status(f"Connected: {self.connected_node_info}")
+            elif state == ConnectionStatus.DISCONNECTED:
                 self.connected_node_info = "N/A"
-                status_display = full_status
-            else:
-                status_display = full_status
-            self.update_status(status_display)
-            self.is_connected = "Connected" in status_display and "Failed" not in status_display
+                self.is_connected = False
+                self.update_status("Disconnected")
+            elif state == ConnectionStatus.FAILED:
+                self.connected_node_info = "N/A"
+                self.is_connected = False
+                self.update_status(f"Connection Failed: {detail}")
             self.update_ui_state()
             return
 
@@ -499,7 +696,10 @@ class AkitaVmailApp:
                 self.log(f"Received non-dict data payload from {from_id}. Ignoring.", logging.WARNING)
                 return
             payload_type = data.get('type')
-            if payload_type == MSG_TYPE_TEST:
+            if payload_type == MSG_TYPE_VOICE_CHUNK: # By far the most frequent during a transfer, so tested first
+                self.process_incoming_chunk(data, from_id, verified)
+
+            elif payload_type == MSG_TYPE_TEST:
                 test_msg = data.get('test', '(empty)')
                 self.log(f"Received Test from {from_id}: {test_msg}")
                 messagebox.showinfo("Test Received", f"From: {from_id}\nMessage: {test_msg}")
@@ -507,23 +707,17 @@ class AkitaVmailApp:
 
             elif payload_type == MSG_TYPE_COMPLETE_VOICE:
                 self.log(f"Processing Complete Voice from {from_id}")
-                crc_ok, raw_voice_data = verify_complete_voice_crc(data)
+                crc_ok, raw_voice_data = verified if verified is not None else verify_complete_voice_crc(data)
                 if crc_ok and raw_voice_data:
-                    timestamp = data.get('timestamp', datetime.now().strftime('%Y%m%d_%H%M%S'))
-                    filename = os.path.join(self.audio_handler.voice_message_dir, f"rec_{from_id}_{timestamp}.wav")
-                    if self.audio_handler.create_wav_from_compressed(raw_voice_data, filename):
-                        desc = f"from {from_id} @ {timestamp}"
-                        self.add_message_to_list(desc, filename, from_id)
-                        self.update_status(f"Received Voice from {from_id}")
-                    else:
-                        self.update_status(f"Voice decode error from {from_id}")
+                    # Only format a local timestamp when the sender did not supply one
+                    timestamp = data.get('timestamp') or format_timestamp()
+                    filename = os.path.join(self._voice_dir, f"rec_{from_id}_{timestamp}.wav")
+                    self._submit(self._decode_voice_thread, raw_voice_data, filename, f"from {from_id} @ {timestamp}", from_id,
+                                 f"Received Voice from {from_id}", f"Voice decode error from {from_id}", pool=self._decode_pool)
                 else:
                     self.log(f"CRC check failed for complete voice from {from_id}", logging.WARNING)
                     self.update_status(f"Voice CRC error from {from_id}")
 
-            elif payload_type == MSG_TYPE_VOICE_CHUNK:
-                self.process_incoming_chunk(data, from_id)
-
             elif payload_type == MSG_TYPE_ACK:
                 ack_id = data.get('ack_id')
                 chunk_num = data.get('chunk_num')
@@ -533,133 +727,216 @@ class AkitaVmailApp:
         else:
             self.log(f"Received unhandled message type '{msg_type}' from {from_id}", logging.WARNING)
 
-    def process_incoming_chunk(self, chunk_data: dict, from_node: str):
-        chunk_id = chunk_data.get('chunk_id')
-        chunk_num = chunk_data.get('chunk_num')
-        total_chunks = chunk_data.get('total_chunks')
-        if not all([chunk_id, isinstance(chunk_num, int), isinstance(total_chunks, int)]):
+    def process_incoming_chunk(self, chunk_data: dict, from_node: str, verified: tuple[bool, bytes | None] | None = None):
+        get = chunk_data.get
+        chunk_id = get('chunk_id')
+        chunk_num = get('chunk_num')
+        total_chunks = get('total_chunks')
+        # Exact int check (JSON gives int, never a subclass) also keeps true/false out
+        if not chunk_id or type(chunk_num) is not int or type(total_chunks) is not int:
             self.log(f"Invalid chunk data from {from_node}: {chunk_data}", logging.WARNING)
             return
+        # total_chunks comes from the remote sender and sizes the bitmask and buffer, so bound it first
+        if not 1 <= chunk_num <= total_chunks <= MAX_CHUNKS_PER_MESSAGE:
+            self.log(f"Chunk {chunk_num}/{total_chunks} for {chunk_id} out of range "
+                     f"(max {MAX_CHUNKS_PER_MESSAGE} chunks). Discarding.", logging.WARNING)
+            return
 
-        self.log(f"Processing chunk {chunk_num}/{total_chunks} (ID: {chunk_id}) from {from_node}", logging.DEBUG)
-        crc_ok, raw_chunk_data = verify_chunk_crc(chunk_data)
+        crc_ok, raw_chunk_data = verified if verified is not None else verify_chunk_crc(chunk_data)
         if not crc_ok:
             self.update_status(f"Chunk CRC error from {from_node} (ID:{chunk_id} Num:{chunk_num})")
             return
+        debug = self._debug
+        if debug:
+            self.log(f"Processing chunk {chunk_num}/{total_chunks} (ID: {chunk_id}) from {from_node}", logging.DEBUG)
 
-        # Send ACK
-        try:
-            self.meshtastic_handler.send_ack(chunk_id, chunk_num, from_node)
-        except Exception:
-            pass
-
-        if chunk_id not in self.message_chunks:
-            if chunk_num == 1:
-                self.message_chunks[chunk_id] = {'chunks': {}, 'total': total_chunks, 'from_id': from_node, 'timestamp': time.time()}
-                self.log(f"Started receiving message {chunk_id} ({total_chunks} chunks) from {from_node}")
-                self.update_status(f"Receiving {chunk_id} from {from_node} (1/{total_chunks})...")
-            else:
+        now = time.time()
+        message_info = self.message_chunks.get(chunk_id)
+        if message_info is None:
+            if chunk_id in self._completed_ids:
+                # Retransmit of a chunk from a message already reassembled: our ACK for it was lost
+                self._send_chunk_ack(chunk_id, chunk_num, from_node)
+                return
+            if chunk_num != 1:
                 self.log(f"Received chunk {chunk_num} for {chunk_id} before chunk 1. Discarding.", logging.WARNING)
                 return
-
-        if chunk_id in self.message_chunks:
-            if chunk_num not in self.message_chunks[chunk_id]['chunks']:
-                self.message_chunks[chunk_id]['chunks'][chunk_num] = raw_chunk_data
-                self.message_chunks[chunk_id]['timestamp'] = time.time()
-                self.log(f"Stored chunk {chunk_num} for {chunk_id}.", logging.DEBUG)
-            else:
-                self.log(f"Duplicate chunk {chunk_num} for {chunk_id}. Ignoring.", logging.DEBUG)
+            # Every chunk but the last is the sender's chunk size, so chunk 1 sizes one contiguous buffer
+            chunk_size = len(raw_chunk_data)
+            if not chunk_size:
+                self.log(f"Empty first chunk for {chunk_id} from {from_node}. Discarding.", logging.WARNING)
                 return
-
-            received_count = len(self.message_chunks[chunk_id]['chunks'])
-            total_expected = self.message_chunks[chunk_id]['total']
-            self.update_status(f"Receiving {chunk_id} ({received_count}/{total_expected})...")
-            self.log(f"Have {received_count}/{total_expected} chunks for {chunk_id}.", logging.DEBUG)
-
-            if received_count >= total_expected:
-                if received_count > total_expected:
-                    self.log(f"Warning: Received more chunks ({received_count}) than expected ({total_expected}) for {chunk_id}.", logging.WARNING)
-                self.log(f"Received all expected chunks for {chunk_id}. Reassembling...")
-                self.reassemble_message(chunk_id)
+            buf_size = total_chunks * chunk_size
+            if not self._make_reassembly_room(buf_size):
+                self.log(f"Message {chunk_id} from {from_node} needs {buf_size} bytes, over the "
+                         f"{self._max_pending_bytes}-byte reassembly limit. Discarding.", logging.WARNING)
+                return
+            self._reasm_bytes += buf_size
+            message_info = self.message_chunks[chunk_id] = {
+                'buf': bytearray(buf_size), 'chunk_size': chunk_size,
+                'mask': 0, 'full': (1 << total_chunks) - 1, 'received': 0, 'length': 0,
+                'total': total_chunks, 'from_id': from_node, 'timestamp': now}
+            heapq.heappush(self._expiry_heap, (now + self._chunk_timeout, chunk_id))
+            if self._chunk_check_after is None:
+                self._schedule_chunk_check()
+            self.log(f"Started receiving message {chunk_id} ({total_chunks} chunks) from {from_node}")
+        elif total_chunks != message_info['total']:
+            self.log(f"Chunk {chunk_num} for {chunk_id} claims {total_chunks} chunks, expected "
+                     f"{message_info['total']}. Discarding.", logging.WARNING)
+            return
         else:
-            self.log(f"Received chunk {chunk_num} for untracked message ID {chunk_id}.", logging.WARNING)
+            self.message_chunks.move_to_end(chunk_id) # Most recently active is evicted last
+
+        bit = 1 << (chunk_num - 1)
+        mask = message_info['mask']
+        if mask & bit:
+            if debug:
+                self.log(f"Duplicate chunk {chunk_num} for {chunk_id}. Ignoring.", logging.DEBUG)
+            self._send_chunk_ack(chunk_id, chunk_num, from_node)
+            return
+        chunk_size = message_info['chunk_size']
+        size = len(raw_chunk_data)
+        if size > chunk_size or (chunk_num < total_chunks and size != chunk_size):
+            self.log(f"Chunk {chunk_num} for {chunk_id} is {size} bytes, expected {chunk_size}. Discarding.", logging.WARNING)
+            return
+        offset = (chunk_num - 1) * chunk_size
+        message_info['buf'][offset:offset + size] = raw_chunk_data
+        message_info['mask'] = mask = mask | bit
+        received_count = message_info['received'] = message_info['received'] + 1
+        if chunk_num == total_chunks:
+            message_info['length'] = offset + size # The short last chunk fixes the payload length
+        message_info['timestamp'] = now
+        self._send_chunk_ack(chunk_id, chunk_num, from_node)
+        total_expected = message_info['total']
+        if debug:
+            self.log(f"Stored chunk {chunk_num} for {chunk_id}. Have {received_count}/{total_expected}.", logging.DEBUG)
+
+        # Built only if this is still the latest status when the coalesced flush runs
+        self.update_status(lambda: f"Receiving {chunk_id} ({received_count}/{total_expected})...")
+
+        if mask == message_info['full']:
+            self.log(f"Received all expected chunks for {chunk_id}. Reassembling...")
+            self.reassemble_message(chunk_id)
 
     def reassemble_message(self, chunk_id: str):
-        if chunk_id not in self.message_chunks:
+        message_info = self.message_chunks.get(chunk_id)
+        if message_info is None:
             self.log(f"Cannot reassemble: ID {chunk_id} not found.", logging.ERROR)
             return
-        message_info = self.message_chunks[chunk_id]
         from_node = message_info['from_id']
         total_chunks = message_info['total']
-        received_chunks_map = message_info['chunks']
-        received_count = len(received_chunks_map)
+        received_count = message_info['received']
 
         if received_count < total_chunks:
             self.log(f"Reassembly called for {chunk_id} but missing chunks ({received_count}/{total_chunks}). Aborting.", logging.WARNING)
             return
 
-        combined_data = b""
-        missing_chunk_numbers = []
         reassembly_successful = True
         try:
-            for i in range(1, total_chunks + 1):
-                if i in received_chunks_map:
-                    combined_data += received_chunks_map[i]
-                else:
-                    missing_chunk_numbers.append(i)
-                    reassembly_successful = False
-
-            if not reassembly_successful:
+            mask = message_info['mask']
+            missing_chunk_numbers = [i for i in range(1, total_chunks + 1) if not mask >> (i - 1) & 1]
+            if missing_chunk_numbers:
+                reassembly_successful = False
                 self.log(f"Reassembly failed for {chunk_id}: Missing data for chunks: {missing_chunk_numbers}", logging.ERROR)
                 self.update_status(f"Reassembly failed for {chunk_id}")
             else:
+                # Chunks were written in place; a view trimmed at the short last chunk goes to the decoder uncopied
+                combined_data = memoryview(message_info['buf'])[:message_info['length']]
                 self.log(f"Combined {total_chunks} chunks for {chunk_id}. Size: {len(combined_data)} bytes.")
-                timestamp_str = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = os.path.join(self.audio_handler.voice_message_dir, f"rec_{from_node}_{timestamp_str}_chunked.wav")
-                if self.audio_handler.create_wav_from_compressed(combined_data, filename):
-                    desc = f"from {from_node} @ {timestamp_str} (Chunked)"
-                    self.add_message_to_list(desc, filename, from_node)
-                    self.update_status(f"Reassembled Voice from {from_node}")
-                    self.log(f"Reassembled and saved {chunk_id} to {filename}")
-                else:
-                    self.update_status(f"Reassembly decode error from {from_node}")
-                    reassembly_successful = False
+                timestamp_str = format_timestamp()
+                filename = os.path.join(self._voice_dir, f"rec_{from_node}_{timestamp_str}_chunked.wav")
+                self._completed_ids.append(chunk_id)
+                self._submit(self._decode_voice_thread, combined_data, filename, f"from {from_node} @ {timestamp_str} (Chunked)", from_node,
+                             f"Reassembled Voice from {from_node}", f"Reassembly decode error from {from_node}", pool=self._decode_pool)
         except Exception as e:
-            self.log(f"Unexpected error reassembling {chunk_id}: {e}", logging.ERROR)
-            import traceback; self.log(traceback.format_exc(), logging.ERROR)
+            self.log(f"Unexpected error reassembling {chunk_id}: {e}", logging.ERROR, exc_info=True)
             reassembly_successful = False
             self.update_status(f"Reassembly error for {chunk_id}")
         finally:
-            if chunk_id in self.message_chunks:
-                del self.message_chunks[chunk_id]
-                self.log(f"Cleaned up chunk data for {chunk_id}.", logging.DEBUG)
+            if self._discard_message(chunk_id) is not None:
+                if self._debug:
+                    self.log(f"Cleaned up chunk data for {chunk_id}.", logging.DEBUG)
+
+    def _decode_voice_thread(self, compressed_data: bytes | memoryview, filename: str, description: str, from_id: str,
+                             ok_status: str, error_status: str):
+        ok = self.audio_handler.create_wav_from_compressed(compressed_data, filename)
+        self.master.after(0, self._decode_finished, ok, filename, description, from_id, ok_status if ok else error_status)
+
+    def _decode_finished(self, ok: bool, filename: str, description: str, from_id: str, status: str):
+        if ok:
+            self.add_message_to_list(description, filename, from_id)
+        self.update_status(status)
+
+    def _make_reassembly_room(self, buf_size: int) -> bool:
+        """
+        Evict the least recently active partial messages until one more of `buf_size` bytes fits
+        within the reassembly limits. False (nothing evicted) if it could never fit.
+        """
+        if buf_size > self._max_pending_bytes:
+            return False
+        evicted = []
+        chunks = self.message_chunks
+        while chunks and (len(chunks) >= self._max_pending_messages
+                          or self._reasm_bytes + buf_size > self._max_pending_bytes):
+            chunk_id = next(iter(chunks))
+            self._discard_message(chunk_id)
+            evicted.append(chunk_id)
+        if evicted:
+            self.log(f"Reassembly limits reached; dropped partial messages {evicted}", logging.WARNING)
+        return True
+
+    def _discard_message(self, chunk_id: str) -> dict | None:
+        """Remove a partial message and release its share of the reassembly budget."""
+        message_info = self.message_chunks.pop(chunk_id, None)
+        if message_info is not None:
+            self._reasm_bytes -= len(message_info['buf'])
+        return message_info
+
+    def _schedule_chunk_check(self):
+        """Arm one timer for the earliest possible reassembly timeout; none while nothing is pending."""
+        if self._chunk_check_after is not None:
+            try: self.master.after_cancel(self._chunk_check_after)
+            except Exception: pass
+            self._chunk_check_after = None
+        heap = self._expiry_heap
+        while heap and heap[0][1] not in self.message_chunks:
+            heapq.heappop(heap) # Already reassembled or discarded
+        if not heap:
+            return
+        delay_ms = max(0, int((heap[0][0] - time.time()) * 1000)) + 50 # Slack so it has expired
+        try:
+            self._chunk_check_after = self.master.after(delay_ms, self.check_incomplete_chunks)
+        except Exception:
+            pass
 
     def check_incomplete_chunks(self):
+        self._chunk_check_after = None
         now = time.time()
         timed_out_ids = []
-        chunk_timeout = get_chunk_timeout(self.config)
-        for chunk_id in list(self.message_chunks.keys()):
+        chunk_timeout = self._chunk_timeout
+        heap = self._expiry_heap
+        # Only entries due by now are looked at; a message that got chunks since is pushed back with its new expiry
+        while heap and heap[0][0] <= now:
+            _, chunk_id = heapq.heappop(heap)
             message_info = self.message_chunks.get(chunk_id)
             if not message_info:
                 continue
-            last_update = message_info.get('timestamp', 0)
-            if now - last_update > chunk_timeout:
+            expiry = message_info.get('timestamp', 0) + chunk_timeout
+            if expiry > now:
+                heapq.heappush(heap, (expiry, chunk_id))
+            elif chunk_id not in timed_out_ids:
                 timed_out_ids.append(chunk_id)
-                rcvd = len(message_info['chunks']); total = message_info['total']
+                rcvd = message_info['received']; total = message_info['total']
                 frm = message_info['from_id']
                 self.log(f"Message {chunk_id} from {frm} timed out ({rcvd}/{total} chunks). Discarding.", logging.WARNING)
 
         if timed_out_ids:
             self.log(f"Cleaning up timed-out messages: {timed_out_ids}", logging.INFO)
             for chunk_id in timed_out_ids:
-                if chunk_id in self.message_chunks:
-                    del self.message_chunks[chunk_id]
+                self._discard_message(chunk_id)
             self.update_status("Cleaned up timed-out messages")
 
-        try:
-            self.master.after(int(chunk_timeout * 1000 / 2), self.check_incomplete_chunks)
-        except Exception:
-            pass
+        # Re-arm for whatever is still pending (timestamps may have moved on since this was scheduled)
+        self._schedule_chunk_check()
 
     def clear_log_display(self):
         clear_scrolled_text(getattr(self, 'log_display', None))
@@ -689,6 +966,13 @@ class AkitaVmailApp:
             self.master.after(100, self._finish_close_after_disconnect, elapsed_ms + 100)
 
     def _finish_close(self):
+        if self._chunk_check_after is not None:
+            try: self.master.after_cancel(self._chunk_check_after)
+            except Exception: pass
+            self._chunk_check_after = None
+        # Drop queued work first so nothing starts on the audio handler after it is cleaned up
+        self._workers.shutdown(wait=False, cancel_futures=True)
+        self._decode_pool.shutdown(wait=False, cancel_futures=True)
         try:
             self.log("Cleaning up audio resources...")
             self.audio_handler.cleanup()
@@ -700,4 +984,5 @@ class AkitaVmailApp:
         except Exception:
             pass
         self.log("Akita vMail closed.")
+        self.log_queue.put(None) # Stop the log listener thread
 # -*- coding: utf-8 -*-
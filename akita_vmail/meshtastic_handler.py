@@ -18,6 +18,7 @@ import time
 import threading
 import logging
 import queue
+from enum import IntEnum
 
 # Import protocol helpers (use runtime getters to avoid module-level constant binding)
 try:
@@ -27,7 +28,7 @@ try:
         parse_payload, verify_chunk_crc, verify_complete_voice_crc,
         split_data_into_chunks, generate_unique_id,
         MSG_TYPE_VOICE_CHUNK, MSG_TYPE_ACK, MSG_TYPE_TEST,
-            MSG_TYPE_COMPLETE_VOICE, get_private_app_port, get_chunk_retry_count, get_chunk_retry_delay, get_ack_timeout
+            MSG_TYPE_COMPLETE_VOICE, get_private_app_port, get_chunk_retry_count, get_chunk_retry_delay, get_ack_timeout, MAX_CHUNKS_PER_MESSAGE
     )
 except ImportError as e:
      logging.critical(f"FATAL: Cannot import from protocol module: {e}. Ensure protocol.py is present.")
@@ -35,6 +36,16 @@ except ImportError as e:
      raise SystemExit("Missing protocol definitions")
 
 
+PORTS_CACHE_TTL_SEC = 5.0 # get_available_ports reuses a scan this recent unless forced
+
+
+class ConnectionStatus(IntEnum):
+    """State carried by 'status' callbacks as `(ConnectionStatus, detail)`; detail is node info or an error."""
+    CONNECTED = 1
+    DISCONNECTED = 2
+    FAILED = 3
+
+
 class MeshtasticHandler:
     """Manages connection and communication with a Meshtastic device."""
 
@@ -46,6 +57,7 @@ class MeshtasticHandler:
             log_queue: A queue for sending log messages to the GUI thread.
             receive_callback: Function in GUI class to call on message receipt.
                               Signature: receive_callback(msg_type, data, from_id, packet_id)
+                              For msg_type 'status', data is (ConnectionStatus, detail).
         """
         self.log_queue = log_queue
         self.receive_callback = receive_callback
@@ -59,6 +71,7 @@ class MeshtasticHandler:
         self.send_lock = threading.Lock()
         self._connection_thread = None
         self.node_list = {} # Store node info {nodeId: nodeInfoDict}
+        self._ports_cache: tuple[float, list[str]] | None = None # (monotonic time, ports) of the last scan
         # Pending ACKs storage: {(chunk_id, chunk_num): threading.Event}
         self._pending_acks: dict = {}
         self._pending_acks_lock = threading.Lock()
@@ -67,21 +80,26 @@ class MeshtasticHandler:
         # Retransmit counters: {(chunk_id, chunk_num): int}
         self._retransmit_counts: dict = {}
 
-    def log(self, message: str, level=logging.INFO):
-        """Log messages via the root logger (which uses the queue)."""
-        if level == logging.DEBUG: logging.debug(message)
-        elif level == logging.INFO: logging.info(message)
-        elif level == logging.WARNING: logging.warning(message)
-        elif level == logging.ERROR: logging.error(message)
-        elif level == logging.CRITICAL: logging.critical(message)
-        else: logging.log(level, message)
-
-    def get_available_ports(self) -> list[str]:
-        """Get a list of available serial COM ports."""
+    def log(self, message: str, level=logging.INFO, *args, exc_info=False):
+        """
+        Log messages via the root logger (which uses the queue).
+        Extra `args` are %-formatted into `message` only if the record is emitted.
+        """
+        logging.log(level, message, *args, exc_info=exc_info)
+
+    def get_available_ports(self, force: bool = False) -> list[str]:
+        """
+        Get a list of available serial COM ports. A scan from the last
+        PORTS_CACHE_TTL_SEC seconds is reused unless `force` is set.
+        """
+        now = time.monotonic()
+        if not force and self._ports_cache and now - self._ports_cache[0] < PORTS_CACHE_TTL_SEC:
+            return list(self._ports_cache[1])
         try:
             ports = [port.device for port in serial.tools.list_ports.comports()]
             self.log(f"Available serial ports: {ports if ports else 'None found'}", logging.DEBUG)
-            return ports
+            self._ports_cache = (now, ports)
+            return list(ports)
         except Exception as e:
             self.log(f"Error listing serial ports: {e}", logging.ERROR)
             return []
@@ -93,7 +111,7 @@ class MeshtasticHandler:
             return
         if not target:
             self.log("Connection target (COM port or IP address) is required.", logging.ERROR)
-            self.receive_callback('status', 'Connection Failed: No target specified', None, None)
+            self.receive_callback('status', (ConnectionStatus.FAILED, 'No target specified'), None, None)
             return
 
         self.log(f"Starting connection attempt to {target}...")
@@ -180,9 +198,7 @@ class MeshtasticHandler:
              self.log(error_message, logging.ERROR)
         except Exception as e:
             error_message = f"Unexpected error connecting to {target}: {e}"
-            self.log(error_message, logging.ERROR)
-            import traceback
-            self.log(traceback.format_exc(), logging.ERROR)
+            self.log(error_message, logging.ERROR, exc_info=True)
         finally:
             if not success:
                  if self.interface: self.interface.close()
@@ -190,8 +206,10 @@ class MeshtasticHandler:
                  self.is_connected = False
 
         # --- Notify the main thread about the connection result ---
-        status_msg = f"Connected: {node_info_str}" if success else f"Connection Failed: {error_message}"
-        self.receive_callback('status', status_msg, node_info_str if success else None, None)
+        if success:
+            self.receive_callback('status', (ConnectionStatus.CONNECTED, node_info_str), None, None)
+        else:
+            self.receive_callback('status', (ConnectionStatus.FAILED, error_message), None, None)
 
 
     def disconnect(self):
@@ -230,7 +248,7 @@ class MeshtasticHandler:
 
         if was_connected: # Only log/notify if it was actually connected before
              self.log("Disconnected.")
-             self.receive_callback('status', 'Disconnected', None, None)
+             self.receive_callback('status', (ConnectionStatus.DISCONNECTED, None), None, None)
 
 
     def _on_connection_status(self, interface, status):
@@ -249,7 +267,7 @@ class MeshtasticHandler:
              if node_id is not None:
                   self.node_list[node_id] = node # Update our copy
                   user = node.get('user', {})
-                  self.log(f"Node info updated: !{node_id:x} ({user.get('longName', 'N/A')})", logging.DEBUG)
+                  self.log("Node info updated: !%x (%s)", logging.DEBUG, node_id, user.get('longName', 'N/A'))
                   # Optionally trigger a GUI update if displaying node list live
                   # self.receive_callback('node_update', self.node_list, None, None)
         except Exception as e:
@@ -308,9 +326,7 @@ class MeshtasticHandler:
             # 3. Other portnums (ignore by default)
 
         except Exception as e:
-            self.log(f"Error processing received packet in _on_receive_raw: {e}", logging.ERROR)
-            import traceback
-            self.log(traceback.format_exc(), logging.ERROR)
+            self.log(f"Error processing received packet in _on_receive_raw: {e}", logging.ERROR, exc_info=True)
 
     # --- ACK handling helpers ---
     def _register_pending_ack(self, chunk_id: str, chunk_num: int):
@@ -391,17 +407,15 @@ class MeshtasticHandler:
         except meshtastic.MeshtasticError as e:
             self.log(f"Meshtastic error sending {description}: {e}", logging.ERROR)
         except Exception as e:
-            self.log(f"Unexpected error sending {description}: {e}", logging.ERROR)
-            import traceback
-            self.log(traceback.format_exc(), logging.ERROR)
+            self.log(f"Unexpected error sending {description}: {e}", logging.ERROR, exc_info=True)
         finally:
             self.sending_active = False
             self.send_lock.release()
         return success
 
 
-    def send_chunked_message(self, data_to_send: bytes, max_chunk_payload_size: int) -> bool:
-        """Splits large data into chunks and sends them sequentially."""
+    def send_chunked_message(self, data_to_send: bytes | memoryview, max_chunk_payload_size: int) -> bool:
+        """Splits large data into chunks (zero-copy views) and sends them sequentially."""
         if not self.is_connected or not self.interface:
             self.log("Cannot send chunks: Not connected.", logging.ERROR)
             return False
@@ -421,27 +435,31 @@ class MeshtasticHandler:
             if total_chunks == 0:
                  self.log("No chunks generated, nothing to send.", logging.WARNING)
                  return False
+            if total_chunks > MAX_CHUNKS_PER_MESSAGE:
+                 self.log(f"Message needs {total_chunks} chunks; receivers accept at most {MAX_CHUNKS_PER_MESSAGE}.", logging.ERROR)
+                 return False
 
             self.log(f"Splitting message into {total_chunks} chunks (ID: {chunk_id}). Max JSON payload/chunk: {max_chunk_payload_size} bytes.")
 
+            # Get retry configuration from protocol (fixed for the whole message)
+            try:
+                retry_count = get_chunk_retry_count(self.config)
+                retry_delay = get_chunk_retry_delay(self.config)
+            except Exception:
+                retry_count = 2
+                retry_delay = 1.0
+            portnum = get_private_app_port(self.config)
+
             for i, chunk_data in enumerate(chunks):
                 chunk_num = i + 1
+                # Each view is only copied here, when it is base64-encoded into its payload
                 payload_bytes = create_chunk_payload(chunk_id, chunk_num, total_chunks, chunk_data)
                 send_success_this_chunk = False
 
-                # Get retry configuration from protocol
-                try:
-                    retry_count = get_chunk_retry_count(self.config)
-                    retry_delay = get_chunk_retry_delay(self.config)
-                except Exception:
-                    retry_count = 2
-                    retry_delay = 1.0
-
                 # For each attempt: send and wait for ACK. If ACK not received within wait_time, retry.
                 for attempt in range(retry_count + 1):
                     self.log(f"Sending chunk {chunk_num}/{total_chunks} (ID:{chunk_id}, Attempt {attempt+1})...")
                     try:
-                        portnum = get_private_app_port(self.config)
                         self.interface.sendData(
                             payload_bytes, destinationId=BROADCAST_ADDR,
                             portNum=portnum, wantAck=True
@@ -494,7 +512,7 @@ class MeshtasticHandler:
                 # Wait between chunks
                 inter_chunk_delay = 1.0 + (len(payload_bytes) / 200.0) # Example dynamic delay
                 inter_chunk_delay = min(inter_chunk_delay, 5.0) # Cap delay
-                self.log(f"Waiting {inter_chunk_delay:.2f}s before next chunk...", logging.DEBUG)
+                self.log("Waiting %.2fs before next chunk...", logging.DEBUG, inter_chunk_delay)
                 time.sleep(inter_chunk_delay)
 
             all_chunks_sent_successfully = True
@@ -504,9 +522,7 @@ class MeshtasticHandler:
         except ValueError as e:
              self.log(f"Error preparing chunks for ID {chunk_id}: {e}", logging.ERROR)
         except Exception as e:
-            self.log(f"Unexpected error during chunked send for ID {chunk_id}: {e}", logging.ERROR)
-            import traceback
-            self.log(traceback.format_exc(), logging.ERROR)
+            self.log(f"Unexpected error during chunked send for ID {chunk_id}: {e}", logging.ERROR, exc_info=True)
         finally:
             self.sending_active = False
             self.send_lock.release()
@@ -536,7 +552,7 @@ class MeshtasticHandler:
 
         try:
             payload_bytes = create_ack_payload(chunk_id, chunk_num)
-            self.log(f"Sending ACK for chunk {chunk_num} (ID:{chunk_id}) to {destination_id}", logging.DEBUG)
+            self.log("Sending ACK for chunk %s (ID:%s) to %s", logging.DEBUG, chunk_num, chunk_id, destination_id)
             portnum = get_private_app_port(self.config)
             self.interface.sendData(
                 payload_bytes,
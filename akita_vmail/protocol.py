@@ -8,6 +8,7 @@ Description: Defines the communication protocol, message formats, constants,
 import zlib
 import json
 import base64
+import binascii
 import uuid
 import math
 import struct
@@ -28,19 +29,24 @@ DEFAULT_CONFIG = {
         "retry_count": 2,
         "retry_delay_sec": 1.0,
         "ack_timeout_sec": 2.0,
-        "receive_timeout_sec": 60
+        "receive_timeout_sec": 60,
+        "max_pending_messages": 16,
+        "max_pending_bytes": 4 * 1024 * 1024
     }
 }
 
 # Fallback constants (used when callers do not pass a config dict)
 PRIVATE_APP_PORT = DEFAULT_CONFIG['meshtastic_port_num']
 CHUNK_SIZES = DEFAULT_CONFIG['chunking']['sizes']
+CHUNK_SIZE_KEYS = tuple(CHUNK_SIZES)
 DEFAULT_CHUNK_SIZE_KEY = DEFAULT_CONFIG['chunking']['default_key']
 DEFAULT_CHUNK_SIZE = CHUNK_SIZES.get(DEFAULT_CHUNK_SIZE_KEY, 180)
 CHUNK_RETRY_COUNT = DEFAULT_CONFIG['chunking']['retry_count']
 CHUNK_RETRY_DELAY = DEFAULT_CONFIG['chunking']['retry_delay_sec']
 ACK_TIMEOUT = DEFAULT_CONFIG['chunking']['ack_timeout_sec']
 CHUNK_TIMEOUT = DEFAULT_CONFIG['chunking']['receive_timeout_sec']
+MAX_PENDING_MESSAGES = DEFAULT_CONFIG['chunking']['max_pending_messages']
+MAX_PENDING_BYTES = DEFAULT_CONFIG['chunking']['max_pending_bytes']
 
 # The protocol module no longer stores config-bound module-level constants.
 # Callers should pass an explicit `config` dict into the getters below.
@@ -97,8 +103,17 @@ def get_chunk_timeout(config: dict | None = None) -> int:
         return config.get("chunking", DEFAULT_CONFIG["chunking"]).get("receive_timeout_sec", DEFAULT_CONFIG["chunking"]["receive_timeout_sec"])
     return CHUNK_TIMEOUT
 
+def get_reassembly_limits(config: dict | None = None) -> tuple[int, int]:
+    """Return (max in-flight chunked messages, max bytes buffered for them) for the receiver."""
+    if isinstance(config, dict):
+        chunk_cfg = config.get("chunking", DEFAULT_CONFIG["chunking"])
+        return (chunk_cfg.get("max_pending_messages", MAX_PENDING_MESSAGES),
+                chunk_cfg.get("max_pending_bytes", MAX_PENDING_BYTES))
+    return MAX_PENDING_MESSAGES, MAX_PENDING_BYTES
+
 # --- Other Constants ---
 BROADCAST_ADDR = "^all"     # Meshtastic broadcast address alias
+MAX_CHUNKS_PER_MESSAGE = 4096 # Upper bound on total_chunks; receivers discard messages claiming more
 
 # --- Message Types --- (Used in the 'type' field of the JSON payload)
 MSG_TYPE_VOICE_CHUNK = "voice_chunk"    # A chunk of a larger voice message
@@ -106,11 +121,17 @@ MSG_TYPE_ACK = "ack"                    # Acknowledgement for a received chunk
 MSG_TYPE_TEST = "test"                  # A simple text message for testing connectivity
 MSG_TYPE_COMPLETE_VOICE = "complete_voice" # A voice message sent in a single packet
 
+# Keys a payload must carry before its CRC can be checked
+_CHUNK_CRC_FIELDS = frozenset(('data', 'crc32', 'chunk_num', 'chunk_id'))
+_COMPLETE_VOICE_CRC_FIELDS = frozenset(('voice_data', 'crc32'))
+
 # --- Protocol Functions ---
 
 def calculate_crc32(data: bytes) -> int:
-    """Calculate CRC32 checksum for byte data."""
-    return zlib.crc32(data) & 0xffffffff # Ensure unsigned 32-bit integer
+    """Calculate CRC32 checksum for byte data (any bytes-like object, e.g. a memoryview chunk)."""
+    # zlib's C implementation is already table/SIMD driven; on Python 3 it returns an unsigned value, so no mask.
+    # (Hardware CRC32C instructions use a different polynomial and would break compatibility with peers.)
+    return zlib.crc32(data)
 
 def create_chunk_payload(chunk_id: str, chunk_num: int, total_chunks: int, chunk_data: bytes) -> bytes:
     """
@@ -179,7 +200,7 @@ def verify_chunk_crc(chunk_payload: dict) -> tuple[bool, bytes | None]:
     Returns (True, raw_chunk_data) if valid, otherwise (False, None).
     """
     if not isinstance(chunk_payload, dict): return False, None # Basic type check
-    if not all(k in chunk_payload for k in ['data', 'crc32', 'chunk_num', 'chunk_id']):
+    if not _CHUNK_CRC_FIELDS <= chunk_payload.keys():
         logging.warning(f"Chunk payload missing required fields: {chunk_payload}")
         return False, None
 
@@ -189,7 +210,7 @@ def verify_chunk_crc(chunk_payload: dict) -> tuple[bool, bytes | None]:
         chunk_num = chunk_payload['chunk_num']
         chunk_id = chunk_payload['chunk_id']
 
-        raw_chunk_data = base64.b64decode(encoded_data)
+        raw_chunk_data = binascii.a2b_base64(encoded_data) # What b64decode calls, minus its argument re-wrapping
         calculated_crc = calculate_crc32(raw_chunk_data)
 
         if received_crc == calculated_crc:
@@ -198,7 +219,7 @@ def verify_chunk_crc(chunk_payload: dict) -> tuple[bool, bytes | None]:
             logging.warning(f"CRC mismatch for chunk {chunk_num}/{chunk_payload.get('total_chunks','?')} "
                             f"(ID: {chunk_id}): Expected {received_crc}, Calculated {calculated_crc}")
             return False, None
-    except (base64.binascii.Error, TypeError) as e:
+    except (binascii.Error, TypeError) as e:
         logging.error(f"Error decoding base64 or calculating CRC for chunk "
                       f"{chunk_payload.get('chunk_num','?')}: {e}")
         return False, None
@@ -212,14 +233,14 @@ def verify_complete_voice_crc(payload: dict) -> tuple[bool, bytes | None]:
     Returns (True, raw_compressed_voice_data) if valid, otherwise (False, None).
     """
     if not isinstance(payload, dict): return False, None # Basic type check
-    if not all(k in payload for k in ['voice_data', 'crc32']):
+    if not _COMPLETE_VOICE_CRC_FIELDS <= payload.keys():
         logging.warning(f"Complete voice payload missing required fields: {payload}")
         return False, None
 
     try:
         received_crc = payload['crc32']
         encoded_data = payload['voice_data']
-        raw_compressed_voice_data = base64.b64decode(encoded_data)
+        raw_compressed_voice_data = binascii.a2b_base64(encoded_data)
         calculated_crc = calculate_crc32(raw_compressed_voice_data)
 
         if received_crc == calculated_crc:
@@ -228,7 +249,7 @@ def verify_complete_voice_crc(payload: dict) -> tuple[bool, bytes | None]:
             logging.warning(f"CRC mismatch for complete voice message: "
                             f"Expected {received_crc}, Calculated {calculated_crc}")
             return False, None
-    except (base64.binascii.Error, TypeError) as e:
+    except (binascii.Error, TypeError) as e:
         logging.error(f"Error decoding base64 or calculating CRC for complete voice message: {e}")
         return False, None
     except Exception as e:
@@ -239,10 +260,11 @@ def generate_unique_id() -> str:
     """Generate a short, reasonably unique ID for messages."""
     return str(uuid.uuid4())[:8]
 
-def split_data_into_chunks(data: bytes, max_chunk_payload_size: int) -> list[bytes]:
+def split_data_into_chunks(data: bytes, max_chunk_payload_size: int) -> list[memoryview]:
     """
     Splits raw byte data into multiple smaller byte chunks suitable for sending.
     Aims to ensure the *final JSON payload* for each chunk does not exceed limit.
+    Chunks are zero-copy memoryview slices of `data`.
     """
     # Dynamically estimate JSON fixed overhead by serializing a sample payload
     # that includes all keys except the base64 data. This provides a safer
@@ -280,11 +302,12 @@ def split_data_into_chunks(data: bytes, max_chunk_payload_size: int) -> list[byt
     if num_chunks == 0 and len(data) > 0:
         num_chunks = 1
 
+    view = memoryview(data)
     chunks = []
     for i in range(num_chunks):
         start_index = i * max_raw_data_size_per_chunk
         end_index = min(start_index + max_raw_data_size_per_chunk, len(data))
-        chunk = data[start_index:end_index]
+        chunk = view[start_index:end_index]
         if chunk:
             chunks.append(chunk)
         else:
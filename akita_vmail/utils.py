@@ -6,11 +6,12 @@ Description: Utility functions for Akita vMail, including configuration loading,
 """
 import tkinter as tk
 from tkinter import scrolledtext, Toplevel, Label
-from datetime import datetime
 import logging
 import logging.handlers # Required for QueueHandler
 import json
 import os
+import time
+import functools
 import collections.abc
 import copy
 
@@ -23,12 +24,16 @@ DEFAULT_CONFIG = {
         "default_key": "Medium",
         "retry_count": 2,
         "retry_delay_sec": 1.0,
-        "receive_timeout_sec": 60
+        "receive_timeout_sec": 60,
+        "max_pending_messages": 16,
+        "max_pending_bytes": 4 * 1024 * 1024
     },
     "audio": {
         "default_quality": "Low",
         "default_length_sec": 3,
-        "quality_rates_hz": {"Ultra Low": 4000, "Very Low": 8000, "Low": 11025}
+        "quality_rates_hz": {"Ultra Low": 4000, "Very Low": 8000, "Low": 11025},
+        "codecs": {"Ultra Low": "ulaw", "Very Low": "ulaw", "Low": "pcm"},
+        "normalize": False
     }
 }
 
@@ -41,7 +46,7 @@ def _recursive_update(d, u):
             d[k] = v
     return d
 
-_CACHED_CONFIG = None
+_CONFIG_CACHE: dict = {} # abspath -> (mtime, config) for get_config
 
 def load_config(config_path="config.json") -> dict:
     """
@@ -74,16 +79,30 @@ def load_config(config_path="config.json") -> dict:
     return config
 
 
+def _config_mtime(path: str) -> float | None:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
 def get_config(config_path="config.json") -> dict:
     """
-    Return a cached configuration dictionary. The file is read only once per process
-    and subsequent calls return the same object. Callers that need fresh reloads
-    should call `load_config` directly.
+    Return a cached configuration dictionary, keyed on the file's path and mtime.
+    Repeated calls return the same object until the file changes on disk, so the
+    JSON is parsed once per edit rather than once per caller.
     """
-    global _CACHED_CONFIG
-    if _CACHED_CONFIG is None:
-        _CACHED_CONFIG = load_config(config_path)
-    return _CACHED_CONFIG
+    key = os.path.abspath(config_path)
+    cached = _CONFIG_CACHE.get(key)
+    if cached is not None and cached[0] == _config_mtime(key):
+        return cached[1]
+    config = load_config(config_path)
+    # Stat after loading: load_config may have just written a default file
+    _CONFIG_CACHE[key] = (_config_mtime(key), config)
+    return config
+
+def invalidate_config_cache():
+    """Forget every cached configuration (the next get_config re-reads from disk)."""
+    _CONFIG_CACHE.clear()
 
 # --- Logging Setup ---
 
@@ -96,23 +115,54 @@ def setup_logging_queue(log_queue):
         logger.addHandler(queue_handler)
         logger.setLevel(logging.INFO) # Set the desired level for the logger
 
+LOG_MAX_LINES = 2000 # Oldest lines are trimmed from the GUI log beyond this
+
+@functools.lru_cache(maxsize=8)
+def _strftime_cached(fmt: str, second: int) -> str:
+    return time.strftime(fmt, time.localtime(second))
+
+def format_timestamp(fmt: str = '%Y%m%d_%H%M%S') -> str:
+    """
+    Local time formatted with `fmt` at one-second resolution (like datetime.now().strftime).
+    Calls within the same second reuse the formatted string.
+    """
+    return _strftime_cached(fmt, int(time.time()))
+
 def log_to_gui(log_display: scrolledtext.ScrolledText, message: str):
     """
     Safely add a timestamped message to the Tkinter ScrolledText log display.
     Ensures the widget is enabled before inserting and disabled afterward.
     """
-    if not log_display or not log_display.winfo_exists(): # Check if widget exists
-        # Fallback to console print if GUI log is unavailable
-        # print(f"GUI Log Unavailable: {message}")
+    timestamp = format_timestamp('%Y-%m-%d %H:%M:%S')
+    log_lines_to_gui(log_display, [f"[{timestamp}] {message}"])
+
+def is_scrolled_to_end(widget) -> bool:
+    """True if the bottom of a scrollable widget's content is in view (or it has no overflow)."""
+    return widget.yview()[1] > 0.999
+
+def log_lines_to_gui(log_display: scrolledtext.ScrolledText, lines: list[str], max_lines: int = LOG_MAX_LINES):
+    """
+    Append already-formatted lines to the log display with a single insert,
+    trim it to `max_lines`, and follow the end only if the view was already there
+    (so a user scrolled up to read history is not yanked back down).
+    """
+    if not lines or not log_display or not log_display.winfo_exists(): # Check if widget exists
         return
     try:
         # Save current state and enable
         original_state = log_display.cget('state')
         log_display.config(state=tk.NORMAL)
 
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        log_display.insert(tk.END, f"[{timestamp}] {message}\n")
-        log_display.see(tk.END) # Scroll to the end
+        at_end = is_scrolled_to_end(log_display)
+        log_display.insert(tk.END, "\n".join(lines) + "\n")
+        # 'end-1c' sits on an empty final line when the text ends in a newline; that line holds no entry
+        last_line, last_col = map(int, log_display.index('end-1c').split('.'))
+        line_count = last_line - 1 if last_col == 0 else last_line
+        if line_count > max_lines:
+            # Delete lines 1 through line_count - max_lines, leaving exactly max_lines
+            log_display.delete('1.0', f'{line_count - max_lines + 1}.0')
+        if at_end:
+            log_display.see(tk.END) # Scroll to the end
 
         # Restore original state
         log_display.config(state=original_state)
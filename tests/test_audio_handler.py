@@ -4,25 +4,44 @@ import types
 import os
 import wave
 import tempfile
-from unittest import TestCase
+import struct
+from unittest import TestCase, skipUnless
 
 # Create a fake minimal pyaudio module before importing the audio handler
 fake_pyaudio = types.ModuleType('pyaudio')
 fake_pyaudio.paInt16 = 8
 fake_pyaudio.paContinue = 0
 fake_pyaudio.paComplete = 1
+fake_pyaudio.paInputUnderflow = 1
+fake_pyaudio.paInputOverflow = 2
+fake_pyaudio.paOutputUnderflow = 4
 
 class FakeStream:
-    def __init__(self):
+    # Models PortAudio's states: a callback returning paComplete leaves the stream
+    # inactive but still running, and start_stream() does nothing until stop_stream()
+    def __init__(self, callback=None):
+        self._callback = callback
+        self._running = False
         self._active = False
     def start_stream(self):
+        if self._running:
+            return
+        self._running = True
         self._active = True
     def stop_stream(self):
+        self._running = False
         self._active = False
     def is_active(self):
         return self._active
     def close(self):
-        self._active = False
+        self.stop_stream()
+    def feed(self, data):
+        """Deliver one input block the way PortAudio would (only while active)."""
+        if not self._active:
+            return
+        _, status = self._callback(data, len(data) // 2, None, 0)
+        if status == fake_pyaudio.paComplete:
+            self._active = False
 
 class FakePyAudio:
     def __init__(self):
@@ -32,12 +51,16 @@ class FakePyAudio:
     def get_format_from_width(self, w):
         return 1
     def open(self, *args, **kwargs):
-        return FakeStream()
+        return FakeStream(kwargs.get('stream_callback'))
     def terminate(self):
         pass
 
 fake_pyaudio.PyAudio = FakePyAudio
 sys.modules['pyaudio'] = fake_pyaudio
+try:
+    import audioop as real_audioop # Stdlib up to 3.12; only needed for the ADPCM codec test
+except ImportError:
+    real_audioop = None
 # Provide a minimal `audioop` module for environments lacking it
 fake_audioop = types.ModuleType('audioop')
 def _ratecv(frames, sample_width, channels, oldrate, newrate, state):
@@ -47,6 +70,9 @@ def _lin2lin(frames, oldwidth, newwidth):
 fake_audioop.ratecv = _ratecv
 fake_audioop.lin2lin = _lin2lin
 fake_audioop.error = Exception
+if real_audioop is not None:
+    fake_audioop.lin2adpcm = real_audioop.lin2adpcm
+    fake_audioop.adpcm2lin = real_audioop.adpcm2lin
 sys.modules['audioop'] = fake_audioop
 
 # Now import the module under test
@@ -98,8 +124,309 @@ class TestAudioHandler(TestCase):
             # verify wave parameters
             with wave.open(out_path, 'rb') as wf:
                 self.assertEqual(wf.getframerate(), 11025)
+
+            # A view into a larger reassembly buffer decodes the same as the bytes
+            slab = bytearray(compressed) + bytearray(64)
+            self.assertTrue(ah.create_wav_from_compressed(memoryview(slab)[:len(compressed)], out_path))
+            with wave.open(out_path, 'rb') as wf:
+                self.assertEqual(wf.getnframes(), 11025)
         finally:
             try: os.remove(path)
             except Exception: pass
             try: os.remove(path + '.out.wav')
             except Exception: pass
+
+    def test_recording_callback_fills_preallocated_buffer(self):
+        cfg = {'audio': {'quality_rates_hz': {'Low': 8000}, 'default_quality': 'Low', 'default_length_sec': 1}}
+        ah = AudioHandler(self.log, config=cfg)
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            ok, _ = ah.start_recording()
+            self.assertTrue(ok)
+            block = struct.pack('<4h', 1, -2, 3, -4)
+            ah._recording_callback(block, 4, None, 0)
+            ah._recording_callback(block, 4, None, 0)
+            # Capacity is (rate * seconds + chunk) frames; a block past it is dropped
+            over = b'\x00\x00' * (len(ah._rec_buf) // 2)
+            _, status = ah._recording_callback(over, len(over) // 2, None, 0)
+            self.assertEqual(status, fake_pyaudio.paComplete)
+            self.assertEqual(ah._rec_dropped, 1)
+            self.assertTrue(ah.stop_recording(path))
+            with wave.open(path, 'rb') as wf:
+                self.assertEqual(wf.getnframes(), 8)
+                self.assertEqual(wf.readframes(8), block * 2)
+        finally:
+            try: os.remove(path)
+            except Exception: pass
+
+    def test_auto_stop_saves_and_reports_result(self):
+        cfg = {'audio': {'quality_rates_hz': {'Low': 8000}, 'default_quality': 'Low', 'default_length_sec': 1}}
+        ah = AudioHandler(self.log, config=cfg)
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        reported = []
+        try:
+            ok, _ = ah.start_recording()
+            self.assertTrue(ok)
+            ah.stream.feed(b'\x01\x00' * 4)
+            ah._auto_stop(path, lambda saved, fp: reported.append((saved, fp)))
+            self.assertEqual(reported, [(True, path)])
+            self.assertFalse(ah.recording)
+            # Once stopped (e.g. manually), a late timer reports nothing
+            ah._auto_stop(path, lambda saved, fp: reported.append((saved, fp)))
+            self.assertEqual(len(reported), 1)
+        finally:
+            try: os.remove(path)
+            except Exception: pass
+
+    def test_repeated_overflows_grow_buffer_for_next_stream(self):
+        cfg = {'audio': {'quality_rates_hz': {'Low': 8000}, 'default_quality': 'Low', 'default_length_sec': 1}}
+        ah = AudioHandler(self.log, config=cfg)
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            stale = FakeStream()
+            stale.close = lambda: setattr(stale, 'closed', True)
+            ah._stream_pool[(16000, 1, ah.chunk)] = stale # Pooled by an earlier recording at another rate
+            ok, _ = ah.start_recording()
+            self.assertTrue(ok)
+            block = struct.pack('<4h', 1, -2, 3, -4)
+            for _ in range(3):
+                ah._recording_callback(block, 4, None, fake_pyaudio.paInputOverflow)
+            self.assertTrue(ah.stop_recording(path))
+            self.assertEqual(ah.chunk, 2048)
+            self.assertEqual(ah._stream_pool, {}) # Old-size streams are closed, not kept
+            self.assertTrue(getattr(stale, 'closed', False))
+            self.assertEqual(ah._xruns, 0)
+        finally:
+            try: os.remove(path)
+            except Exception: pass
+
+    def test_playback_callback_serves_mapped_frames(self):
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        pcm = struct.pack('<6h', 1, 2, 3, 4, 5, 6)
+        try:
+            with wave.open(path, 'wb') as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(8000)
+                wf.writeframes(pcm)
+            ah = AudioHandler(self.log, config={'audio': {}})
+            self.assertTrue(ah.start_playback(path))
+            first, status = ah._playback_callback(None, 4, None, 0)
+            self.assertEqual((first, status), (pcm[:8], fake_pyaudio.paContinue))
+            rest, _ = ah._playback_callback(None, 4, None, 0)
+            self.assertEqual(rest, pcm[8:])
+            self.assertFalse(ah.playback_done.is_set())
+            end, status = ah._playback_callback(None, 4, None, 0)
+            self.assertEqual((end, status), (b'', fake_pyaudio.paComplete))
+            self.assertTrue(ah.playback_done.is_set())
+            ah.playback_finished()
+            self.assertIsNone(ah._mm)
+        finally:
+            try: os.remove(path)
+            except Exception: pass
+
+    def test_unexpected_errors_pass_traceback_to_log_callback(self):
+        import akita_vmail.audio_handler as audio_mod
+        records = []
+        ah = AudioHandler(lambda msg, level=None, exc_info=False: records.append((msg, exc_info)))
+        original = audio_mod._decompress_payload
+        audio_mod._decompress_payload = lambda *args: 1 / 0
+        try:
+            self.assertFalse(ah.create_wav_from_compressed(b'\x02x', os.path.join(tempfile.gettempdir(), 'unused.wav')))
+            # A callback without exc_info gets the formatted traceback as a second line instead
+            legacy = AudioHandler(self.log)
+            self.assertFalse(legacy.create_wav_from_compressed(b'\x02x', os.path.join(tempfile.gettempdir(), 'unused.wav')))
+        finally:
+            audio_mod._decompress_payload = original
+        self.assertEqual([exc for msg, exc in records if 'Unexpected error' in msg], [True])
+        self.assertIn('ZeroDivisionError', self.logs[-1][0])
+
+    def test_normalize_raises_quiet_pcm16_peak(self):
+        from akita_vmail.audio_handler import _normalize_pcm16, NORMALIZE_PEAK
+        out = struct.unpack('<3h', _normalize_pcm16(struct.pack('<3h', 1000, -500, 0)))
+        self.assertEqual(out, (NORMALIZE_PEAK, -NORMALIZE_PEAK // 2, 0))
+        loud = struct.pack('<2h', 32767, -32768)
+        self.assertEqual(_normalize_pcm16(loud), loud)
+
+    def test_stopped_input_stream_is_reused(self):
+        cfg = {'audio': {'quality_rates_hz': {'Low': 8000}, 'default_quality': 'Low', 'default_length_sec': 1}}
+        ah = AudioHandler(self.log, config=cfg)
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            ah.start_recording()
+            first = ah.stream
+            first.feed(b'\x00\x00' * 4)
+            # A block past the buffer makes the callback return paComplete: inactive, not stopped
+            first.feed(b'\x00\x00' * (len(ah._rec_buf) // 2))
+            self.assertFalse(first.is_active())
+            self.assertTrue(ah.stop_recording(path))
+            self.assertIs(ah._stream_pool[(8000, 1, ah.chunk)], first)
+            ah.start_recording()
+            self.assertIs(ah.stream, first)
+            self.assertTrue(first.is_active())
+            block = struct.pack('<4h', 5, -6, 7, -8)
+            first.feed(block)
+            self.assertTrue(ah.stop_recording(path))
+            with wave.open(path, 'rb') as wf:
+                self.assertEqual(wf.readframes(wf.getnframes()), block)
+            ah.cleanup()
+            self.assertEqual(ah._stream_pool, {})
+        finally:
+            try: os.remove(path)
+            except Exception: pass
+
+    def test_zlib_fallback_and_legacy_payloads_decode(self):
+        import zlib
+        from unittest.mock import patch
+        import akita_vmail.audio_handler as audio_mod
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            with wave.open(path, 'wb') as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(11025)
+                wf.writeframes(b'\x01\x00' * 2000)
+
+            cfg = {'audio': {'quality_rates_hz': {'Low': 11025}, 'default_quality': 'Low'}}
+            ah = AudioHandler(self.log, config=cfg)
+            with patch.object(audio_mod, '_ZSTD_CCTX', None):
+                compressed = ah.compress_audio(path, 'Low')
+            self.assertEqual(compressed[0], audio_mod.COMPRESSION_DEFLATE)
+            self.assertTrue(ah.create_wav_from_compressed(compressed, path + '.out.wav'))
+
+            # Untagged zlib payloads from older senders are still accepted
+            header = b'11025,1,2'
+            legacy = zlib.compress(struct.pack('!B', len(header)) + header + b'\x01\x00' * 10)
+            self.assertTrue(ah.create_wav_from_compressed(legacy, path + '.out.wav'))
+            with wave.open(path + '.out.wav', 'rb') as wf:
+                self.assertEqual(wf.getnframes(), 10)
+        finally:
+            for p in (path, path + '.out.wav'):
+                try: os.remove(p)
+                except Exception: pass
+
+    def test_concurrent_compressions_decode_correctly(self):
+        from concurrent.futures import ThreadPoolExecutor
+        paths = []
+        try:
+            for n in range(4):
+                fd, path = tempfile.mkstemp(suffix='.wav')
+                os.close(fd)
+                paths.append(path)
+                with wave.open(path, 'wb') as wf:
+                    wf.setnchannels(1)
+                    wf.setsampwidth(2)
+                    wf.setframerate(11025)
+                    wf.writeframes(struct.pack('<h', n + 1) * 20000)
+            cfg = {'audio': {'quality_rates_hz': {'Low': 11025}, 'default_quality': 'Low'}}
+            ah = AudioHandler(self.log, config=cfg)
+            with ThreadPoolExecutor(4) as pool:
+                results = list(pool.map(lambda p: ah.compress_audio(p, 'Low'), paths * 4))
+            for i, compressed in enumerate(results):
+                n = i % len(paths)
+                out = paths[n] + '.out.wav'
+                self.assertTrue(ah.create_wav_from_compressed(compressed, out))
+                with wave.open(out, 'rb') as wf:
+                    self.assertEqual(wf.readframes(wf.getnframes()), struct.pack('<h', n + 1) * 20000)
+        finally:
+            for p in paths:
+                for f in (p, p + '.out.wav'):
+                    try: os.remove(f)
+                    except Exception: pass
+
+    def test_compress_downsamples_to_target_rate(self):
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            with wave.open(path, 'wb') as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(11025)
+                wf.writeframes(b'\x00' * 11025 * 2)
+
+            cfg = {'audio': {'quality_rates_hz': {'Low': 11025, 'Very Low': 8000}, 'default_quality': 'Low'}}
+            ah = AudioHandler(self.log, config=cfg)
+            compressed = ah.compress_audio(path, 'Very Low')
+            self.assertIsNotNone(compressed)
+            self.assertTrue(ah.create_wav_from_compressed(compressed, path + '.out.wav'))
+            with wave.open(path + '.out.wav', 'rb') as wf:
+                self.assertEqual(wf.getframerate(), 8000)
+        finally:
+            for p in (path, path + '.out.wav'):
+                try: os.remove(p)
+                except Exception: pass
+
+    def test_ulaw_codec_roundtrip(self):
+        import math
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            samples = [int(8000 * math.sin(i / 5.0)) for i in range(800)]
+            with wave.open(path, 'wb') as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(8000)
+                wf.writeframes(struct.pack(f'<{len(samples)}h', *samples))
+
+            cfg = {'audio': {'quality_rates_hz': {'Very Low': 8000}, 'default_quality': 'Very Low',
+                             'codecs': {'Very Low': 'ulaw'}}}
+            ah = AudioHandler(self.log, config=cfg)
+            compressed = ah.compress_audio(path, 'Very Low')
+            self.assertTrue(ah.create_wav_from_compressed(compressed, path + '.out.wav'))
+            with wave.open(path + '.out.wav', 'rb') as wf:
+                self.assertEqual(wf.getsampwidth(), 2)
+                decoded = struct.unpack(f'<{wf.getnframes()}h', wf.readframes(wf.getnframes()))
+            self.assertEqual(len(decoded), len(samples))
+            # µ-law keeps the error within a few percent of the sample magnitude
+            for orig, dec in zip(samples, decoded):
+                self.assertLessEqual(abs(orig - dec), abs(orig) // 16 + 8)
+        finally:
+            for p in (path, path + '.out.wav'):
+                try: os.remove(p)
+                except Exception: pass
+
+    @skipUnless(real_audioop is not None, "audioop not available")
+    def test_ulaw_tables_match_audioop(self):
+        from akita_vmail.audio_handler import _pcm16_to_ulaw, _ulaw_to_pcm16
+        every_sample = struct.pack('<65536h', *range(-32768, 32768))
+        self.assertEqual(_pcm16_to_ulaw(every_sample), real_audioop.lin2ulaw(every_sample, 2))
+        every_code = bytes(range(256))
+        self.assertEqual(bytes(_ulaw_to_pcm16(every_code)), real_audioop.ulaw2lin(every_code, 2))
+
+    @skipUnless(real_audioop is not None, "audioop not available")
+    def test_adpcm_codec_roundtrip(self):
+        import math
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            samples = [int(8000 * math.sin(i / 5.0)) for i in range(801)]
+            with wave.open(path, 'wb') as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(8000)
+                wf.writeframes(struct.pack(f'<{len(samples)}h', *samples))
+
+            cfg = {'audio': {'quality_rates_hz': {'Very Low': 8000}, 'default_quality': 'Very Low',
+                             'codecs': {'Very Low': 'adpcm'}}}
+            ah = AudioHandler(self.log, config=cfg)
+            ulaw_size = len(samples) # µ-law would carry one byte per sample
+            compressed = ah.compress_audio(path, 'Very Low')
+            self.assertTrue(ah.create_wav_from_compressed(compressed, path + '.out.wav'))
+            with wave.open(path + '.out.wav', 'rb') as wf:
+                self.assertEqual(wf.getsampwidth(), 2)
+                self.assertEqual(wf.getnframes(), 800) # Odd trailing sample dropped
+                decoded = struct.unpack('<800h', wf.readframes(800))
+            self.assertLess(len(compressed), ulaw_size)
+            # ADPCM adapts its step size, so compare once the predictor has settled
+            for orig, dec in list(zip(samples, decoded))[50:]:
+                self.assertLessEqual(abs(orig - dec), 1500)
+        finally:
+            for p in (path, path + '.out.wav'):
+                try: os.remove(p)
+                except Exception: pass
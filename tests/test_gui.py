@@ -0,0 +1,303 @@
+import sys
+import types
+import queue
+import logging
+import threading
+import collections
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+# The GUI imports the audio and radio libraries; provide minimal fakes unless
+# another test module already installed its own
+fake_pyaudio = types.ModuleType('pyaudio')
+fake_pyaudio.paInt16 = 8
+fake_pyaudio.paContinue = 0
+fake_pyaudio.paComplete = 1
+fake_pyaudio.paInputUnderflow = 1
+fake_pyaudio.paInputOverflow = 2
+fake_pyaudio.paOutputUnderflow = 4
+fake_pyaudio.PyAudio = MagicMock
+sys.modules.setdefault('pyaudio', fake_pyaudio)
+try:
+    import audioop # noqa: F401 (stdlib up to 3.12)
+except ImportError:
+    sys.modules['audioop'] = types.ModuleType('audioop')
+
+meshtastic = sys.modules.setdefault('meshtastic', types.ModuleType('meshtastic'))
+if not hasattr(meshtastic, 'MeshtasticError'):
+    meshtastic.MeshtasticError = Exception
+for _name in ('serial_interface', 'tcp_interface', 'util'):
+    _module = sys.modules.setdefault(f'meshtastic.{_name}', types.ModuleType(f'meshtastic.{_name}'))
+    if not hasattr(meshtastic, _name):
+        setattr(meshtastic, _name, _module)
+
+from akita_vmail import gui
+from akita_vmail.protocol import create_chunk_payload, parse_payload, MAX_CHUNKS_PER_MESSAGE
+
+
+class FakeMaster:
+    """Stands in for the Tk root: after()/after_idle() callbacks are queued until run_pending()."""
+    def __init__(self):
+        self.pending = []
+        self.delays = []
+    def after(self, ms, func=None, *args):
+        self.pending.append((func, args))
+        self.delays.append(ms)
+        return f"after#{len(self.pending)}"
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+    def after_cancel(self, after_id):
+        pass
+    def run_pending(self):
+        while self.pending:
+            func, args = self.pending.pop(0)
+            func(*args)
+
+
+class FakeListbox:
+    def __init__(self):
+        self.rows = []
+    def size(self):
+        return len(self.rows)
+    def insert(self, index, *rows):
+        self.rows.extend(rows)
+    def delete(self, first):
+        del self.rows[first]
+    def get(self, index):
+        return self.rows[index]
+    def yview(self, *args):
+        return (0.0, 1.0)
+
+
+def make_app(max_messages=16, max_bytes=4 << 20, chunk_timeout=60.0):
+    """An AkitaVmailApp with just the reassembly state, bypassing the Tk widgets built by __init__."""
+    app = gui.AkitaVmailApp.__new__(gui.AkitaVmailApp)
+    app.master = FakeMaster()
+    app.meshtastic_handler = MagicMock()
+    app.message_chunks = collections.OrderedDict()
+    app._reasm_bytes = 0
+    app._completed_ids = collections.deque(maxlen=gui.RECENT_COMPLETED_IDS)
+    app._expiry_heap = []
+    app._chunk_check_after = None
+    app._chunk_timeout = chunk_timeout
+    app._max_pending_messages = max_messages
+    app._max_pending_bytes = max_bytes
+    app._debug = True
+    app._voice_dir = 'voice'
+    app._decode_pool = None
+    app.logs = []
+    app.log = lambda message, level=logging.INFO, exc_info=False: app.logs.append((level, message))
+    app.statuses = []
+    app.update_status = app.statuses.append
+    app.submitted = []
+    app._submit = lambda fn, *args, pool=None: app.submitted.append((fn, args))
+    return app
+
+
+def chunk(chunk_id, num, total, data):
+    return parse_payload(create_chunk_payload(chunk_id, num, total, data))
+
+
+class TestChunkReassembly(TestCase):
+    def setUp(self):
+        self.app = make_app()
+
+    def acks(self):
+        send_ack = self.app.meshtastic_handler.send_ack
+        return [args for fn, args in self.app.submitted if fn == send_ack]
+
+    def decoded(self):
+        return [bytes(args[0]) for fn, args in self.app.submitted if fn == self.app._decode_voice_thread]
+
+    def feed(self, chunk_id, num, total, data, from_node='!a'):
+        self.app.process_incoming_chunk(chunk(chunk_id, num, total, data), from_node)
+
+    def test_in_order_chunks_reassemble(self):
+        self.feed('m1', 1, 3, b'aaaa')
+        self.feed('m1', 2, 3, b'bbbb')
+        self.feed('m1', 3, 3, b'cc')
+        self.assertEqual(self.decoded(), [b'aaaabbbbcc'])
+        self.assertEqual(self.acks(), [('m1', 1, '!a'), ('m1', 2, '!a'), ('m1', 3, '!a')])
+        self.assertNotIn('m1', self.app.message_chunks)
+        self.assertEqual(self.app._reasm_bytes, 0)
+
+    def test_out_of_order_chunks_reassemble(self):
+        self.feed('m1', 1, 3, b'aaaa')
+        self.feed('m1', 3, 3, b'cc')
+        self.feed('m1', 2, 3, b'bbbb')
+        self.assertEqual(self.decoded(), [b'aaaabbbbcc'])
+        self.assertEqual(self.app._reasm_bytes, 0)
+
+    def test_duplicate_chunk_is_acked_but_stored_once(self):
+        self.feed('m1', 1, 2, b'aaaa')
+        self.feed('m1', 1, 2, b'zzzz')
+        self.assertEqual(self.app.message_chunks['m1']['received'], 1)
+        self.feed('m1', 2, 2, b'bb')
+        self.assertEqual(self.decoded(), [b'aaaabb'])
+        self.assertEqual(self.acks(), [('m1', 1, '!a'), ('m1', 1, '!a'), ('m1', 2, '!a')])
+
+    def test_retransmit_after_reassembly_is_acked_not_decoded_again(self):
+        self.feed('m1', 1, 1, b'aaaa')
+        self.feed('m1', 1, 1, b'aaaa') # Our ACK was lost, so the sender retried
+        self.assertEqual(self.decoded(), [b'aaaa'])
+        self.assertEqual(self.acks(), [('m1', 1, '!a'), ('m1', 1, '!a')])
+        self.assertNotIn('m1', self.app.message_chunks)
+
+    def test_rejected_chunks_are_not_acked(self):
+        self.feed('big', 1, MAX_CHUNKS_PER_MESSAGE + 1, b'aaaa') # Too many chunks
+        self.feed('late', 2, 3, b'aaaa')                         # Before chunk 1
+        self.feed('empty', 1, 3, b'')                            # Empty first chunk
+        self.feed('m1', 1, 3, b'aaaa')
+        self.feed('m1', 2, 4, b'bbbb')                           # Total mismatch
+        self.feed('m1', 2, 3, b'bbbbbb')                         # Wrong size
+        bad_crc = chunk('m1', 2, 3, b'bbbb')
+        bad_crc['crc32'] ^= 1
+        self.app.process_incoming_chunk(bad_crc, '!a')
+        self.assertEqual(self.acks(), [('m1', 1, '!a')])
+        self.assertEqual(list(self.app.message_chunks), ['m1'])
+        self.assertEqual(self.app.message_chunks['m1']['received'], 1)
+
+    def test_oversized_message_is_discarded_unacked(self):
+        self.app._max_pending_bytes = 100
+        self.feed('m1', 1, 30, b'aaaa') # 120-byte buffer
+        self.assertEqual(self.app.message_chunks, {})
+        self.assertEqual(self.app._reasm_bytes, 0)
+        self.assertEqual(self.acks(), [])
+
+    def test_eviction_by_count_drops_least_recently_active(self):
+        self.app._max_pending_messages = 2
+        self.feed('m1', 1, 2, b'aaaa')
+        self.feed('m2', 1, 2, b'bbbb')
+        self.feed('m3', 1, 3, b'cccc')
+        self.assertEqual(list(self.app.message_chunks), ['m2', 'm3'])
+        self.assertEqual(self.app._reasm_bytes, 8 + 12)
+
+    def test_eviction_respects_activity_order(self):
+        self.app._max_pending_messages = 2
+        self.feed('m1', 1, 3, b'aaaa')
+        self.feed('m2', 1, 3, b'bbbb')
+        self.feed('m1', 2, 3, b'aaaa') # m1 is now the most recently active
+        self.feed('m3', 1, 3, b'cccc')
+        self.assertEqual(list(self.app.message_chunks), ['m1', 'm3'])
+
+    def test_eviction_by_bytes(self):
+        self.app._max_pending_bytes = 20
+        self.feed('m1', 1, 2, b'aaaa') # 8 bytes
+        self.feed('m2', 1, 2, b'bbbb') # 16
+        self.feed('m3', 1, 2, b'cccc') # 24 > 20, so m1 goes
+        self.assertEqual(list(self.app.message_chunks), ['m2', 'm3'])
+        self.assertEqual(self.app._reasm_bytes, 16)
+        self.app._discard_message('m2')
+        self.app._discard_message('m3')
+        self.assertEqual(self.app._reasm_bytes, 0)
+
+    def test_timeout_discards_and_releases_bytes(self):
+        app = self.app = make_app(chunk_timeout=0)
+        self.feed('m1', 1, 2, b'aaaa')
+        self.assertEqual(app._reasm_bytes, 8)
+        app.check_incomplete_chunks()
+        self.assertEqual(app.message_chunks, {})
+        self.assertEqual(app._reasm_bytes, 0)
+        self.assertEqual(app._expiry_heap, [])
+        self.assertIn("Cleaned up timed-out messages", app.statuses)
+
+    def test_timeout_skips_reassembled_and_evicted_ids(self):
+        app = self.app = make_app(max_messages=1, chunk_timeout=0)
+        self.feed('done', 1, 1, b'aaaa')  # Reassembled at once
+        self.feed('gone', 1, 2, b'bbbb')
+        self.feed('kept', 1, 2, b'cccc')  # Evicts 'gone'
+        self.assertEqual(len(app._expiry_heap), 3)
+        app.check_incomplete_chunks()
+        timed_out = [m for level, m in app.logs if 'timed out' in m]
+        self.assertEqual(len(timed_out), 1)
+        self.assertIn('kept', timed_out[0])
+        self.assertEqual(app._expiry_heap, [])
+        self.assertEqual(app._reasm_bytes, 0)
+
+    def test_active_message_is_pushed_back_not_expired(self):
+        self.feed('m1', 1, 2, b'aaaa')
+        info = self.app.message_chunks['m1']
+        self.app._expiry_heap[:] = [(0, 'm1')] # Due, but the message got a chunk since
+        self.app.check_incomplete_chunks()
+        self.assertIn('m1', self.app.message_chunks)
+        self.assertEqual(self.app._expiry_heap, [(info['timestamp'] + 60.0, 'm1')])
+        self.assertIsNotNone(self.app._chunk_check_after)
+
+
+class TestMessageList(TestCase):
+    def setUp(self):
+        app = self.app = make_app()
+        app._msg_path = collections.deque(maxlen=gui.MAX_LISTED_MESSAGES)
+        app._msg_from = collections.deque(maxlen=gui.MAX_LISTED_MESSAGES)
+        app._pending_rows = []
+        app._rows_flush_scheduled = False
+        app.messages_list = FakeListbox()
+
+    def add(self, first, count):
+        for n in range(first, first + count):
+            self.app.add_message_to_list(f"msg {n}", f"/v/{n}.wav", '!a')
+
+    def assert_aligned(self):
+        app = self.app
+        self.assertEqual(app.messages_list.size(), len(app._msg_path))
+        for i, path in enumerate(app._msg_path):
+            n = path[len('/v/'):-len('.wav')]
+            self.assertTrue(app.messages_list.get(i).endswith(f" msg {n}"), (i, app.messages_list.get(i), path))
+
+    def test_rows_stay_aligned_past_limit_with_rows_pending(self):
+        limit = gui.MAX_LISTED_MESSAGES
+        self.add(0, limit - 100)
+        self.app.master.run_pending()
+        self.add(limit - 100, 300) # Overflows while most of these rows are still pending
+        self.assertEqual(len(self.app._pending_rows), 300)
+        self.app.master.run_pending()
+        self.assertEqual(self.app.messages_list.size(), limit)
+        self.assert_aligned()
+        self.assertEqual(self.app._msg_path[0], "/v/200.wav")
+
+    def test_rows_stay_aligned_when_overflowing_before_first_flush(self):
+        self.add(0, gui.MAX_LISTED_MESSAGES + 50)
+        self.app.master.run_pending()
+        self.assert_aligned()
+        self.assertEqual(self.app._msg_path[0], "/v/50.wav")
+
+
+class TestLogListener(TestCase):
+    def setUp(self):
+        app = self.app = make_app()
+        app.log_queue = queue.Queue()
+        app._pending_log = []
+        app._log_lock = threading.Lock()
+        app._log_flush_scheduled = False
+        app._log_flush_deferred = False
+
+    def listen(self, levels):
+        """Queue one record per level, then run the listener until it reaches the stop record."""
+        for n, level in enumerate(levels):
+            self.app.log_queue.put(logging.makeLogRecord(
+                {'levelno': level, 'levelname': logging.getLevelName(level), 'msg': f"line {n}"}))
+        self.app.log_queue.put(None)
+        self.app._log_listener()
+
+    def test_debug_lines_are_shed_once_behind_but_info_never_is(self):
+        self.listen([logging.DEBUG] * (gui.LOG_PENDING_HIGH + 100)) # Not behind yet: all kept
+        self.assertEqual(len(self.app._pending_log), gui.LOG_PENDING_HIGH + 100)
+        self.app._pending_log.clear()
+        self.app._pending_log.extend(["old"] * gui.LOG_PENDING_HIGH)
+        self.listen([logging.DEBUG, logging.INFO, logging.DEBUG] * 400)
+        new = self.app._pending_log[gui.LOG_PENDING_HIGH:]
+        self.assertEqual(sum(' - INFO - ' in line for line in new), 400)
+        self.assertEqual(sum(' - DEBUG - ' in line for line in new), 0)
+        skipped = [line for line in new if 'DEBUG lines not shown' in line]
+        self.assertEqual(skipped, ["(800 DEBUG lines not shown: GUI log is behind)"])
+
+    def test_info_during_deferred_flush_schedules_immediate_flush(self):
+        master = self.app.master
+        self.listen([logging.DEBUG])
+        self.assertEqual(master.delays, [gui.LOG_DEBUG_FLUSH_MS])
+        self.listen([logging.DEBUG]) # Rides on the flush already queued
+        self.assertEqual(master.delays, [gui.LOG_DEBUG_FLUSH_MS])
+        self.listen([logging.INFO])
+        self.assertEqual(master.delays, [gui.LOG_DEBUG_FLUSH_MS, 0])
+        self.listen([logging.INFO]) # An immediate flush is already queued
+        self.assertEqual(master.delays, [gui.LOG_DEBUG_FLUSH_MS, 0])
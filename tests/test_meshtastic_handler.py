@@ -117,3 +117,19 @@ class TestMeshtasticHandler(TestCase):
         with patch('akita_vmail.meshtastic_handler.serial.tools.list_ports.comports', side_effect=Exception('boom')):
             ports = handler.get_available_ports()
             self.assertEqual(ports, [])
+
+    def test_get_available_ports_reuses_recent_scan(self):
+        handler = mh.MeshtasticHandler(self.log_q, self.recv_cb, config={})
+        port = types.SimpleNamespace(device='/dev/ttyUSB0')
+        with patch('akita_vmail.meshtastic_handler.serial.tools.list_ports.comports', return_value=[port]) as comports:
+            self.assertEqual(handler.get_available_ports(), ['/dev/ttyUSB0'])
+            self.assertEqual(handler.get_available_ports(), ['/dev/ttyUSB0'])
+            self.assertEqual(comports.call_count, 1)
+            handler.get_available_ports(force=True)
+            self.assertEqual(comports.call_count, 2)
+
+    def test_connect_without_target_reports_failed_status(self):
+        events = []
+        handler = mh.MeshtasticHandler(self.log_q, lambda t, d, f, p: events.append((t, d)), config={})
+        handler.connect('')
+        self.assertEqual(events, [('status', (mh.ConnectionStatus.FAILED, 'No target specified'))])
@@ -1,6 +1,8 @@
 import unittest
 
-from akita_vmail.protocol import split_data_into_chunks, DEFAULT_CONFIG
+from akita_vmail.protocol import (
+    split_data_into_chunks, create_chunk_payload, parse_payload, verify_chunk_crc, DEFAULT_CONFIG
+)
 
 
 class TestProtocol(unittest.TestCase):
@@ -14,6 +16,13 @@ class TestProtocol(unittest.TestCase):
         reassembled = b''.join(chunks)
         self.assertEqual(reassembled, data)
 
+    def test_verify_chunk_crc(self):
+        payload = parse_payload(create_chunk_payload('abc', 1, 1, b'voice bytes'))
+        self.assertEqual(verify_chunk_crc(payload), (True, b'voice bytes'))
+        self.assertEqual(verify_chunk_crc(dict(payload, crc32=payload['crc32'] ^ 1)), (False, None))
+        self.assertEqual(verify_chunk_crc(dict(payload, data='not base64!')), (False, None))
+        self.assertEqual(verify_chunk_crc({'data': payload['data']}), (False, None))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -8,6 +8,11 @@ class TestProtocolRefresh(unittest.TestCase):
         port = protocol.get_private_app_port(custom)
         self.assertEqual(port, 999)
 
+    def test_reassembly_limits_use_config_with_defaults(self):
+        custom = {"chunking": {"max_pending_messages": 4}}
+        self.assertEqual(protocol.get_reassembly_limits(custom), (4, protocol.MAX_PENDING_BYTES))
+        self.assertEqual(protocol.get_reassembly_limits(), (protocol.MAX_PENDING_MESSAGES, protocol.MAX_PENDING_BYTES))
+
 
 if __name__ == '__main__':
     unittest.main()
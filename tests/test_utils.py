@@ -1,6 +1,11 @@
+import json
+import os
+import tempfile
+import time
 import unittest
+from unittest import mock
 
-from akita_vmail.utils import _recursive_update
+from akita_vmail.utils import _recursive_update, format_timestamp, get_config, invalidate_config_cache, log_lines_to_gui
 
 
 class TestUtils(unittest.TestCase):
@@ -11,6 +16,62 @@ class TestUtils(unittest.TestCase):
         _recursive_update(base, update)
         self.assertEqual(base, expected)
 
+    def test_get_config_caches_until_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'config.json')
+            with open(path, 'w') as f:
+                json.dump({'meshtastic_port_num': 300}, f)
+            first = get_config(path)
+            self.assertIs(get_config(path), first)
+            self.assertEqual(first['meshtastic_port_num'], 300)
+
+            with open(path, 'w') as f:
+                json.dump({'meshtastic_port_num': 301}, f)
+            st = os.stat(path)
+            os.utime(path, (st.st_atime, st.st_mtime + 5))
+            self.assertEqual(get_config(path)['meshtastic_port_num'], 301)
+
+            cached = get_config(path)
+            invalidate_config_cache()
+            self.assertIsNot(get_config(path), cached)
+
+    def test_format_timestamp_matches_strftime_per_second(self):
+        second = 1_700_000_000
+        with mock.patch('akita_vmail.utils.time.time', return_value=second + 0.25):
+            first = format_timestamp()
+        with mock.patch('akita_vmail.utils.time.time', return_value=second + 0.75):
+            self.assertIs(format_timestamp(), first)
+            self.assertEqual(format_timestamp('%H:%M:%S'), time.strftime('%H:%M:%S', time.localtime(second)))
+        self.assertEqual(first, time.strftime('%Y%m%d_%H%M%S', time.localtime(second)))
+
+
+    def test_log_lines_to_gui_keeps_exactly_max_lines(self):
+        class FakeText:
+            """Just enough of tk.Text: line.column indexes, appends and whole-line deletes."""
+            def __init__(self):
+                self.text = ''
+            def winfo_exists(self): return True
+            def cget(self, option): return 'disabled'
+            def config(self, **options): pass
+            def yview(self): return (0.0, 1.0)
+            def see(self, index): pass
+            def insert(self, index, chars): self.text += chars
+            def index(self, index):
+                assert index == 'end-1c'
+                lines = self.text.split('\n')
+                return f"{len(lines)}.{len(lines[-1])}"
+            def delete(self, start, end):
+                assert start == '1.0' and end.endswith('.0')
+                self.text = '\n'.join(self.text.split('\n')[int(end.split('.')[0]) - 1:])
+
+        widget = FakeText()
+        log_lines_to_gui(widget, ['a', 'b', 'c'], max_lines=5)
+        self.assertEqual(widget.text, 'a\nb\nc\n')
+        log_lines_to_gui(widget, ['d', 'e', 'f', 'g'], max_lines=5)
+        self.assertEqual(widget.text, 'c\nd\ne\nf\ng\n')
+        log_lines_to_gui(widget, ['h'], max_lines=5)
+        self.assertEqual(widget.text.splitlines(), ['d', 'e', 'f', 'g', 'h'])
+
 
 if __name__ == '__main__':
     unittest.main()